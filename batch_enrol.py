@@ -0,0 +1,92 @@
+"""
+Batch enrolment for the hostel management system.
+Registers students listed in a CSV file from a folder of photos, without the
+registration screen.
+
+The CSV needs the columns roll_number, name, hostel_name, room_number and
+contact_number. An optional photo column names the photo files (separated by
+";"); otherwise every image in the folder whose name starts with the roll
+number (e.g. B21CS001.jpg, B21CS001_2.jpg) is used.
+"""
+
+import csv
+import os
+
+from frame_sources import IMAGE_EXTENSIONS
+
+STUDENT_FIELDS = ["roll_number", "name", "hostel_name", "room_number", "contact_number"]
+
+
+def _photos_by_roll_number(photo_dir):
+    """Map roll numbers to photo paths using the file names in photo_dir"""
+    photos = {}
+    for name in sorted(os.listdir(photo_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        stem = os.path.splitext(name)[0]
+        roll_number = stem.split("_")[0]
+        photos.setdefault(roll_number, []).append(os.path.join(photo_dir, name))
+    return photos
+
+
+def read_enrolment_csv(csv_path, photo_dir):
+    """Read the students to enrol
+
+    Returns (students, errors): (student_data, photo_paths) pairs ready for
+    FaceAuthenticator.register_batch, and a (line, message) pair per row
+    that cannot be enrolled.
+    """
+    photos = _photos_by_roll_number(photo_dir)
+    students = []
+    errors = []
+
+    with open(csv_path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [field for field in STUDENT_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{csv_path} is missing the columns: {', '.join(missing)}")
+
+        for row in reader:
+            line = reader.line_num
+            student_data = {field: (row[field] or "").strip() for field in STUDENT_FIELDS}
+
+            empty = [field for field, value in student_data.items() if not value]
+            if empty:
+                errors.append((line, f"Empty {', '.join(empty)}"))
+                continue
+
+            if (row.get("photo") or "").strip():
+                photo_paths = [os.path.join(photo_dir, name.strip())
+                               for name in row["photo"].split(";") if name.strip()]
+            else:
+                photo_paths = photos.get(student_data["roll_number"], [])
+
+            if not photo_paths:
+                errors.append((line, f"No photo found for {student_data['roll_number']}"))
+                continue
+
+            students.append((student_data, photo_paths))
+
+    return students, errors
+
+
+def enrol_from_csv(face_authenticator, csv_path, photo_dir, num_workers=None):
+    """Enrol every student in the CSV, print a report and return the number registered"""
+    students, errors = read_enrolment_csv(csv_path, photo_dir)
+    for line, message in errors:
+        print(f"Line {line}: {message}")
+
+    results, failures = face_authenticator.register_batch(students, num_workers)
+    for path, message in failures:
+        print(f"{path}: {message}")
+
+    registered = 0
+    for roll_number, success, message in results:
+        if success:
+            registered += 1
+        else:
+            print(f"{roll_number}: {message}")
+
+    print(f"Registered {registered} of {len(students) + len(errors)} students "
+          f"({len(failures)} unusable photos, {len(errors)} invalid rows)")
+    return registered
@@ -0,0 +1,101 @@
+"""
+Face detector benchmarks: latency and recall of each backend on one image set.
+
+Every image is assumed to hold at least one face. Recall is the share of
+images in which a detector finds a face, or, given an annotations CSV with
+image,top,right,bottom,left rows, the share of annotated faces matched by a
+detection at IoU 0.5 or more. Run from the repository root:
+
+    python benchmarks/bench_detectors.py --images path/to/faces --detectors hog haar haar>hog dnn
+"""
+
+import argparse
+import csv
+import os
+import time
+
+from common import load_images, print_result, summarize, write_results
+
+from face_detectors import DEFAULT_DNN_CONFIG, DEFAULT_DNN_MODEL, create_detector
+from face_tracker import box_iou
+
+
+def load_annotations(path):
+    """Map image file names to their annotated (top, right, bottom, left) face boxes"""
+    annotations = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            box = tuple(int(row[field]) for field in ("top", "right", "bottom", "left"))
+            annotations.setdefault(row["image"], []).append(box)
+    return annotations
+
+
+def recall(detections, annotations):
+    """Share of faces found: annotated boxes if available, otherwise images with any detection"""
+    if annotations is None:
+        return sum(1 for boxes in detections.values() if boxes) / len(detections)
+
+    found = total = 0
+    for name, truth in annotations.items():
+        boxes = detections.get(name)
+        if boxes is None:
+            continue
+        total += len(truth)
+        found += sum(1 for face in truth if any(box_iou(face, box) >= 0.5 for box in boxes))
+    return found / total if total else 0.0
+
+
+def bench_detector(spec, images, annotations, repeat):
+    """Time a detector over the image set and measure its recall"""
+    detector = create_detector(spec)
+    detector.detect(images[0][1])  # Warm up
+
+    durations = []
+    detections = {}
+    for _ in range(repeat):
+        for name, frame in images:
+            start = time.perf_counter()
+            detections[name] = detector.detect(frame)
+            durations.append(time.perf_counter() - start)
+
+    faces = sum(len(boxes) for boxes in detections.values())
+    return summarize("detect", durations, detector=spec, images=len(images),
+                     recall=round(recall(detections, annotations), 3),
+                     faces_per_image=round(faces / len(images), 2))
+
+
+def main():
+    default_detectors = ["hog", "haar", "haar>hog"]
+    if os.path.exists(DEFAULT_DNN_MODEL) and os.path.exists(DEFAULT_DNN_CONFIG):
+        default_detectors += ["dnn", "dnn>hog"]
+
+    parser = argparse.ArgumentParser(description="Face detector latency and recall benchmarks")
+    parser.add_argument("--images", required=True, help="Directory of test images, each with at least one face")
+    parser.add_argument("--annotations", help="CSV of image,top,right,bottom,left face boxes")
+    parser.add_argument("--detectors", nargs="+", default=default_detectors, help="Detector specs to compare")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the image set per detector")
+    parser.add_argument("--output", default="bench_results_detectors.json", help="Machine-readable results file")
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        print(f"No readable images in {args.images}")
+        return
+
+    annotations = load_annotations(args.annotations) if args.annotations else None
+
+    results = []
+    for spec in args.detectors:
+        try:
+            result = bench_detector(spec, images, annotations, args.repeat)
+        except ValueError as e:
+            print(f"Skipping {spec}: {e}")
+            continue
+        print_result(result)
+        results.append(result)
+
+    write_results(args.output, "detectors", results)
+
+
+if __name__ == "__main__":
+    main()
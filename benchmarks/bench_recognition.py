@@ -0,0 +1,166 @@
+"""
+Recognition latency benchmarks on synthetic galleries.
+
+Times the gallery match stage, load_known_faces, get_all_face_encodings,
+loading the JSON database and, given a directory of test images, a full
+detect+encode+match pass. With --templates above 1 the match stage is also
+timed with the centroid and medoid pre-filters, and with --quantization for
+each quantized gallery, along with its memory and its agreement with exact
+matching. --sharded times a per-hostel sharded gallery for a gate of hostel
+H1: home hostel matches, students of other hostels and strangers. Run from
+the repository root:
+
+    python benchmarks/bench_recognition.py --sizes 100 1000 10000 100000 --images path/to/faces
+"""
+
+import argparse
+import os
+import tempfile
+
+from common import (load_images, print_result, random_encodings, summarize, synthetic_database,
+                    time_calls, write_results)
+
+from face_auth import FaceAuthenticator
+
+
+def bench_sharded(face_auth, database, size, repeat, home="H1"):
+    """Benchmark matching on a gallery sharded by hostel, from a gate of the home hostel"""
+    students = database.data["students"]
+    noise = 0.01 * random_encodings(repeat, seed=3)
+    probe_sets = {
+        "home": [s["face_encoding"] for s in students if s["hostel_name"] == home],
+        "other_hostel": [s["face_encoding"] for s in students if s["hostel_name"] != home],
+        "stranger": list(random_encodings(repeat, seed=4)),
+    }
+
+    results = []
+    face_auth.set_gallery_sharding(True)
+    for probe_type, probes in probe_sets.items():
+        probes = [probes[i % len(probes)] + noise[i] for i in range(repeat)]
+        probe_iter = iter(probes * 2)
+        durations = time_calls(lambda: face_auth._match_encodings([next(probe_iter)], home), repeat)
+        results.append(summarize("match", durations, gallery_size=size, sharding=probe_type,
+                                 shards_loaded=len(face_auth.gallery.shards)))
+    face_auth.set_gallery_sharding(False)
+    return results
+
+
+def bench_gallery(size, repeat, max_load_size, tmp_dir, templates=1, quantizations=(), sharded=False):
+    """Benchmark the per-gallery stages for one gallery size"""
+    results = []
+    db_path = os.path.join(tmp_dir, f"gallery_{size}.json")
+    database = synthetic_database(db_path, size, save=size <= max_load_size, templates=templates)
+
+    results.append(summarize("get_all_face_encodings",
+                             time_calls(database.get_all_face_encodings, max(3, repeat // 10)),
+                             gallery_size=size, templates=templates))
+
+    face_auth = FaceAuthenticator(database)
+    results.append(summarize("load_known_faces",
+                             time_calls(face_auth.load_known_faces, max(3, repeat // 10)),
+                             gallery_size=size, templates=templates))
+
+    if size <= max_load_size:
+        results.append(summarize("database_load_data",
+                                 time_calls(database.load_data, 3, warmup=1),
+                                 gallery_size=size, templates=templates))
+
+    # Probes: half are noisy copies of enrolled faces, half are strangers
+    probes = random_encodings(repeat, seed=1)
+    known = face_auth.known_face_matrix[:repeat // 2] + 0.01 * random_encodings(repeat // 2, seed=2)
+    probes[:len(known)] = known
+    probe_iter = iter(list(probes) * 2)
+
+    results.append(summarize("match",
+                             time_calls(lambda: face_auth._match_encodings([next(probe_iter)]), repeat),
+                             gallery_size=size, templates=templates, gallery_bytes=face_auth.gallery.nbytes))
+
+    exact = [student_id for student_id, _ in face_auth._match_encodings(probes)]
+    for quantization in quantizations:
+        face_auth.set_gallery_quantization(quantization)
+        probe_iter = iter(list(probes) * 2)
+        durations = time_calls(lambda: face_auth._match_encodings([next(probe_iter)]), repeat)
+        matched = [student_id for student_id, _ in face_auth._match_encodings(probes)]
+        agreement = sum(a == b for a, b in zip(exact, matched)) / len(exact)
+        results.append(summarize("match", durations, gallery_size=size, templates=templates,
+                                 quantization=quantization, gallery_bytes=face_auth.gallery.nbytes,
+                                 agreement=round(agreement, 4)))
+    face_auth.set_gallery_quantization(None)
+
+    if sharded:
+        results.extend(bench_sharded(face_auth, database, size, repeat))
+
+    if templates > 1:
+        for prefilter in ("centroid", "medoid"):
+            face_auth.set_gallery_prefilter(prefilter)
+            probe_iter = iter(list(probes) * 2)
+            results.append(summarize("match",
+                                     time_calls(lambda: face_auth._match_encodings([next(probe_iter)]), repeat),
+                                     gallery_size=size, templates=templates, prefilter=prefilter))
+        face_auth.set_gallery_prefilter(None)
+
+    probe_iter = iter(list(probes) * 2)
+
+    def match_and_lookup():
+        student_id, _ = face_auth._match_encodings([next(probe_iter)])[0]
+        face_auth._student_result(student_id)
+
+    results.append(summarize("match_and_lookup", time_calls(match_and_lookup, repeat),
+                             gallery_size=size, templates=templates))
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    return results
+
+
+def bench_pipeline(images, size, repeat, tmp_dir):
+    """Benchmark a full detect+encode+match pass over the test images"""
+    database = synthetic_database(os.path.join(tmp_dir, "pipeline.json"), size, save=False)
+    face_auth = FaceAuthenticator(database)
+    face_auth.multi_face = True
+    face_auth.use_tracking = False
+
+    image_iter = iter(images * (repeat // len(images) + 2))
+    durations = time_calls(lambda: face_auth.recognize_faces(next(image_iter)),
+                           max(len(images), repeat // 10), warmup=1)
+    return summarize("detect_encode_match", durations, gallery_size=size,
+                     images=len(images), model=face_auth.face_detection_model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognition latency benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                        help="Synthetic gallery sizes")
+    parser.add_argument("--repeat", type=int, default=500, help="Timed calls per stage")
+    parser.add_argument("--images", help="Directory of test images for the full pipeline pass")
+    parser.add_argument("--max-load-size", type=int, default=10000,
+                        help="Largest gallery written to JSON for the load_data benchmark")
+    parser.add_argument("--templates", type=int, default=1, help="Face templates per synthetic student")
+    parser.add_argument("--quantization", nargs="*", default=[], choices=["int8", "pq"],
+                        help="Also time matching on these quantized galleries")
+    parser.add_argument("--sharded", action="store_true", help="Also time a gallery sharded by hostel")
+    parser.add_argument("--output", default="bench_results.json", help="Machine-readable results file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            for result in bench_gallery(size, args.repeat, args.max_load_size, tmp_dir, args.templates,
+                                        args.quantization, args.sharded):
+                print_result(result)
+                results.append(result)
+
+        if args.images:
+            images = [frame for _, frame in load_images(args.images)]
+            if images:
+                result = bench_pipeline(images, min(args.sizes), args.repeat, tmp_dir)
+                print_result(result)
+                results.append(result)
+            else:
+                print(f"No readable images in {args.images}; skipping the pipeline benchmark")
+
+    write_results(args.output, "recognition", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Startup time benchmarks based on python -X importtime.
+
+Times importing each module in a fresh interpreter, reports the cumulative
+import time Python measured for it and the slowest modules it pulled in, and
+flags heavy modules (dlib, pandas, speech engines) that startup should not
+import any more. Run from the repository root:
+
+    python benchmarks/bench_startup.py --modules main gui face_auth
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+from common import REPO_ROOT, print_result, summarize, write_results
+
+# Modules that should only be imported on first use, not at startup
+HEAVY_MODULES = ("face_recognition", "dlib", "pandas", "pyttsx3", "speech_recognition", "transformers")
+
+
+def import_times(module):
+    """Import module in a fresh interpreter with -X importtime
+
+    Returns {module name: (self microseconds, cumulative microseconds)}, or
+    raises RuntimeError if the import fails.
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             cwd=REPO_ROOT, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def time_command(command):
+    """Wall time of running a command to completion"""
+    start = time.perf_counter()
+    subprocess.run(command, cwd=REPO_ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def bench_module(module, repeat):
+    """Time a cold import of module and break it down with -X importtime"""
+    times = import_times(module)
+
+    durations = [time_command([sys.executable, "-c", f"import {module}"]) for _ in range(repeat)]
+
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    return summarize("startup_import", durations, module=module,
+                     importtime_ms=round(times.get(module, (0, 0))[1] / 1000, 1),
+                     slowest=",".join(f"{name}:{self_us / 1000:.0f}ms" for name, (self_us, _) in slowest),
+                     heavy=",".join(name for name in HEAVY_MODULES if name in times) or "none")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup import time benchmarks")
+    parser.add_argument("--modules", nargs="+", default=["main", "gui", "face_auth"],
+                        help="Modules whose cold import is timed")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--output", default="bench_results_startup.json", help="Machine-readable results file")
+    args = parser.parse_args()
+
+    # The interpreter alone, to subtract from the import times
+    results = [summarize("startup_interpreter",
+                         [time_command([sys.executable, "-c", "pass"]) for _ in range(args.repeat)])]
+    print_result(results[0])
+
+    for module in args.modules:
+        try:
+            result = bench_module(module, args.repeat)
+        except RuntimeError as e:
+            print(f"Skipping {module}: {e}")
+            continue
+        print_result(result)
+        results.append(result)
+
+    write_results(args.output, "startup", results)
+
+
+if __name__ == "__main__":
+    main()
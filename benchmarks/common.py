@@ -0,0 +1,142 @@
+"""
+Shared helpers for the benchmark suite: timing, percentile summaries,
+synthetic galleries, test images and machine-readable result files.
+"""
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Benchmarks run from the repository root or from this directory
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def time_calls(func, repeat, warmup=3):
+    """Call func repeatedly and return the per-call durations in seconds"""
+    for _ in range(warmup):
+        func()
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(name, durations, **params):
+    """Summarize durations as p50/p95/p99 latency (ms) and throughput"""
+    samples = np.asarray(durations)
+    total = samples.sum()
+    result = {
+        "name": name,
+        "samples": len(samples),
+        "mean_ms": float(samples.mean() * 1000),
+        "p50_ms": float(np.percentile(samples, 50) * 1000),
+        "p95_ms": float(np.percentile(samples, 95) * 1000),
+        "p99_ms": float(np.percentile(samples, 99) * 1000),
+        "throughput_per_s": float(len(samples) / total) if total > 0 else None,
+    }
+    result.update(params)
+    return result
+
+
+def print_result(result):
+    """Print one summarized result on a single line"""
+    params = {k: v for k, v in result.items()
+              if k not in ("name", "samples", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "throughput_per_s")}
+    extra = " ".join(f"{k}={v}" for k, v in params.items())
+    print(f"{result['name']:<32} p50={result['p50_ms']:9.3f}ms p95={result['p95_ms']:9.3f}ms "
+          f"p99={result['p99_ms']:9.3f}ms thr={result['throughput_per_s'] or 0:10.1f}/s {extra}")
+
+
+def random_encodings(count, seed=0):
+    """Random unit-norm 128-d encodings, shaped like face_recognition output"""
+    rng = np.random.default_rng(seed)
+    encodings = rng.standard_normal((count, 128))
+    encodings /= np.linalg.norm(encodings, axis=1, keepdims=True)
+    return encodings
+
+
+def synthetic_students(count, seed=0, hostels=("H1", "H2", "H3", "H4"), templates=1):
+    """Student records in the HostelDatabase format with random encodings
+
+    templates > 1 adds noisy copies of each primary encoding as enrolment templates.
+    """
+    encodings = random_encodings(count, seed)
+    extra = encodings[:, None, :] + 0.05 * random_encodings(count * (templates - 1), seed + 1).reshape(
+        count, templates - 1, 128)
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        {
+            "id": i + 1,
+            "roll_number": f"B{i:07d}",
+            "name": f"Student {i}",
+            "hostel_name": hostels[i % len(hostels)],
+            "room_number": str(100 + i % 400),
+            "contact_number": "0000000000",
+            "face_encoding": encodings[i],
+            "enrolment_encodings": list(extra[i]),
+            "learned_encodings": [],
+            "registration_date": now,
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_database(path, count, seed=0, save=True, templates=1):
+    """Create a HostelDatabase at path holding count synthetic students"""
+    from database import HostelDatabase
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    database = HostelDatabase(path)
+    database.data["students"] = synthetic_students(count, seed, templates=templates)
+    if save:
+        database.save_data()
+    return database
+
+
+def load_images(directory):
+    """Load the test images in a directory as (file name, RGB frame) pairs"""
+    images = []
+    for name in sorted(os.listdir(directory)):
+        frame = cv2.imread(os.path.join(directory, name))
+        if frame is not None:
+            images.append((name, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+    return images
+
+
+def git_commit():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, suite, results):
+    """Write results with enough metadata to compare runs across commits"""
+    report = {
+        "suite": suite,
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
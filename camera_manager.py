@@ -0,0 +1,156 @@
+"""
+Multi-camera support for the hostel management system.
+Runs one capture thread per gate camera, all feeding the same recognition
+worker pool and gallery of a single FaceAuthenticator.
+"""
+
+import functools
+import threading
+
+from frame_scheduler import AdaptiveScheduler
+from identity_vote import IdentityVoter
+from motion_gate import StateCpuMeter
+
+
+def parse_camera_source(source):
+    """Turn a device index given as text into an int; files and URLs pass through"""
+    if isinstance(source, str) and source.strip().isdigit():
+        return int(source)
+    return source
+
+
+def parse_camera_spec(spec):
+    """Split a [GATE[:DIRECTION]=]SOURCE camera argument into (source, gate, direction)"""
+    gate, sep, source = spec.partition("=")
+    # Stream URLs carry "=" in their query string, so a gate name never
+    # contains the characters of a URL or path
+    if not sep or any(part in gate for part in ("://", "?", "/")):
+        return spec, None, None
+
+    direction = None
+    if gate.rsplit(":", 1)[-1] in ("entry", "exit"):
+        gate, direction = gate.rsplit(":", 1)
+    return source, gate or None, direction
+
+
+class CameraFeed:
+    """Capture state, recognition results and statistics for one camera"""
+
+    def __init__(self, source=0, gate=None, tracker=None, voter=None, scheduler=None, direction=None,
+                 hostel=None):
+        self.source = parse_camera_source(source)
+        self.gate = gate or f"Camera {self.source}"
+        self.direction = direction  # "entry" or "exit" for hands-free logging, None otherwise
+        self.hostel = hostel  # Home hostel searched first by a sharded gallery
+        self.tracker = tracker
+        self.voter = voter or IdentityVoter()
+        self.scheduler = scheduler or AdaptiveScheduler()
+
+        # Frame sequence numbers let out-of-order results be discarded
+        self.frame_seq = 0
+        self.last_result_seq = 0
+
+        # Voted recognition result for this camera; changes only on identity transitions
+        self.last_recognized_student = None
+        self.last_recognized_students = []
+        self.last_message = "No face detected"
+
+        # Statistics
+        self.fps = 0.0
+        self.idle = False
+        self.cpu = StateCpuMeter()
+        self.frames_captured = 0
+        self.frames_dropped = 0  # Captured but not processed (no free ring slot or unusable shape)
+        self.frames_resized = 0  # Captured at another size than the frame ring's
+        self.frames_submitted = 0
+        self.results = 0
+        self.stale_results = 0
+        self.identity_changes = 0
+        self.error = None
+
+    def stats(self):
+        """Return the per-camera statistics as a dictionary"""
+        stats = {
+            "gate": self.gate,
+            "source": self.source,
+            "direction": self.direction,
+            "hostel": self.hostel,
+            "fps": round(self.fps, 1),
+            "state": "idle" if self.idle else "active",
+            "cpu_active_percent": round(self.cpu.percent("active"), 1),
+            "cpu_idle_percent": round(self.cpu.percent("idle"), 1),
+            "frames_captured": self.frames_captured,
+            "frames_dropped": self.frames_dropped,
+            "frames_resized": self.frames_resized,
+            "frames_submitted": self.frames_submitted,
+            "results": self.results,
+            "stale_results": self.stale_results,
+            "identity_changes": self.identity_changes,
+            "error": self.error,
+        }
+        stats.update(self.scheduler.stats())
+        return stats
+
+
+class CameraManager:
+    def __init__(self, face_authenticator, sources):
+        """Initialize the manager
+
+        face_authenticator: the shared FaceAuthenticator (one gallery, one pool)
+        sources: list of (source, gate, direction) tuples; source is a device index, file path
+        or URL, direction is "entry", "exit" or None
+        """
+        self.face_authenticator = face_authenticator
+        self.feeds = [face_authenticator.create_feed(source, gate, direction=direction)
+                      for source, gate, direction in sources]
+
+        self.stop_event = threading.Event()
+        self._pool = None
+        self._threads = []
+
+    def start(self, frame_callback=None):
+        """Start one capture thread per camera
+
+        frame_callback, if given, is called as frame_callback(feed, frame, student, message, students=...)
+        """
+        self.stop_event.clear()
+
+        # One recognition pool shared by every camera
+        self._pool = self.face_authenticator.create_recognition_pool(len(self.feeds))
+        self._pool.start()
+
+        for feed in self.feeds:
+            callback = functools.partial(frame_callback, feed) if frame_callback is not None else None
+
+            thread = threading.Thread(target=self._run_feed, args=(feed, callback),
+                                      name=f"capture-{feed.gate}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _run_feed(self, feed, frame_callback):
+        """Capture loop for one camera"""
+        result = self.face_authenticator.run_feed(feed, frame_callback, self.stop_event, self._pool)
+        if result != "Video feed stopped":
+            feed.error = result
+
+    def stop(self):
+        """Stop all capture threads and the shared recognition pool"""
+        self.stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+
+        if self._pool is not None:
+            self._pool.stop()
+            self._pool = None
+
+        self.face_authenticator.release_cameras()
+
+    def stats(self):
+        """Return statistics for every camera"""
+        return [feed.stats() for feed in self.feeds]
+
+    def is_running(self):
+        """Check whether any capture thread is still running"""
+        return any(thread.is_alive() for thread in self._threads)
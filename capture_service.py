@@ -0,0 +1,169 @@
+"""
+Shared camera capture for the hostel management system.
+One long-lived service owns each camera device: it opens and configures the
+device once and hands the latest frame to every subscribed consumer, so the
+recognition and registration screens can switch without reopening the camera.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+class CaptureService:
+    """Owns one camera device and fans its frames out to subscribers"""
+
+    def __init__(self, source=0, width=640, height=480, fps=30, fourcc="MJPG"):
+        """Initialize the service; the device is opened on the first subscription"""
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+
+        self._cap = None
+        self._thread = None
+        self._running = False
+        self._condition = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._subscribers = 0
+
+    def start(self):
+        """Open and configure the device and start reading; returns False if it cannot be opened"""
+        with self._condition:
+            if self._running:
+                return True
+
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                cap.release()
+                return False
+
+            # Negotiate the format once: compressed frames, fixed size, no driver-side backlog
+            if self.fourcc:
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+            self._cap = cap
+            self._running = True
+            self._thread = threading.Thread(target=self._read_loop, name=f"capture-{self.source}")
+            self._thread.daemon = True
+            self._thread.start()
+            return True
+
+    def _read_loop(self):
+        cap = self._cap
+        buffer = None
+        paused = False
+        while True:
+            with self._condition:
+                # Keep the device open but stop decoding while nobody is watching
+                while self._running and not self._subscribers:
+                    paused = True
+                    self._condition.wait()
+                if not self._running:
+                    break
+
+            if paused:
+                cap.grab()  # Drop the frame that waited in the driver while paused
+                paused = False
+
+            ret, buffer = cap.read(buffer)
+
+            with self._condition:
+                if not ret:
+                    self._running = False
+                    self._condition.notify_all()
+                    break
+
+                # Publish the new frame and reuse the previous one as the next read buffer
+                self._frame, buffer = buffer, self._frame
+                self._seq += 1
+                self._condition.notify_all()
+
+        cap.release()
+
+    def subscribe(self):
+        """Create a frame source that receives this camera's frames"""
+        return CaptureSubscription(self)
+
+    def read_after(self, seq, buffer=None, timeout=2.0):
+        """Wait for a frame newer than seq and copy it into buffer
+
+        Returns (seq, frame), or (seq, None) if the camera stopped or timed out.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._seq > seq or not self._running, timeout):
+                return seq, None
+            if self._seq <= seq:
+                return seq, None
+
+            if buffer is None or buffer.shape != self._frame.shape:
+                buffer = np.empty_like(self._frame)
+            np.copyto(buffer, self._frame)
+            return self._seq, buffer
+
+    def _add_subscriber(self, count):
+        with self._condition:
+            self._subscribers += count
+            self._condition.notify_all()
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def stop(self):
+        """Stop reading and release the device"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+
+class CaptureSubscription:
+    """Frame source reading the shared frames of a CaptureService"""
+
+    realtime = True
+
+    def __init__(self, service):
+        self.service = service
+        self.source = service.source
+        self.position = 0
+        self._seq = 0
+        self._subscribed = False
+
+    def open(self):
+        """Start the service if needed and subscribe; returns False if the camera cannot be opened"""
+        if not self.service.start():
+            return False
+        if not self._subscribed:
+            self._subscribed = True
+            self._seq = self.service.seq  # Only frames captured from now on
+            self.service._add_subscriber(1)
+        return True
+
+    def read(self, buffer=None, timeout=2.0):
+        """Wait for the next frame and copy it into buffer when possible"""
+        self._seq, frame = self.service.read_after(self._seq, buffer, timeout)
+        if frame is None:
+            return False, None
+        self.position += 1
+        return True, frame
+
+    @property
+    def frame_name(self):
+        """Identifier of the last frame read"""
+        return str(self.position - 1)
+
+    def release(self):
+        """Unsubscribe; the device stays open for the next consumer"""
+        if self._subscribed:
+            self._subscribed = False
+            self.service._add_subscriber(-1)
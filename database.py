@@ -5,11 +5,22 @@ import pickle
 import threading
 import base64
 
+from metrics import DB_LOCK_WAIT_SECONDS, LOG_ENTRIES, SAVE_DATA_SECONDS, TimedLock
+
+# Student fields holding face encodings, pickled and base64-encoded on disk:
+# the primary encoding, the rest of the enrolment burst, and templates learned
+# from accepted recognitions
+ENCODING_FIELDS = ("face_encoding", "enrolment_encodings", "learned_encodings")
+
 class HostelDatabase:
     def __init__(self, db_path="hostel_data.json"):
         """Initialize the database"""
         self.db_path = db_path
-        self.lock = threading.RLock()  # Reentrant lock for thread safety
+        # Reentrant lock for thread safety; waits are recorded in the metrics registry
+        self.lock = TimedLock(threading.RLock(), DB_LOCK_WAIT_SECONDS)
+
+        # Change feed: callbacks called as callback(event, data) after each change
+        self.change_listeners = []
 
         # Initialize data structure
         self.data = {
@@ -30,9 +41,10 @@ class HostelDatabase:
 
                         # Convert face encodings back from base64
                         for student in data.get('students', []):
-                            if 'face_encoding' in student:
-                                face_encoding_bytes = base64.b64decode(student['face_encoding'])
-                                student['face_encoding'] = pickle.loads(face_encoding_bytes)
+                            for field in ENCODING_FIELDS:
+                                if field in student:
+                                    face_encoding_bytes = base64.b64decode(student[field])
+                                    student[field] = pickle.loads(face_encoding_bytes)
 
                         self.data = data
             except (json.JSONDecodeError, IOError) as e:
@@ -42,7 +54,7 @@ class HostelDatabase:
 
     def save_data(self):
         """Save data to JSON file"""
-        with self.lock:
+        with self.lock, SAVE_DATA_SECONDS.time():
             # Create a copy of the data for serialization
             data_copy = {
                 "students": [],
@@ -52,9 +64,10 @@ class HostelDatabase:
             # Convert face encodings to base64 for JSON serialization
             for student in self.data["students"]:
                 student_copy = student.copy()
-                if 'face_encoding' in student_copy:
-                    face_encoding_bytes = pickle.dumps(student_copy['face_encoding'])
-                    student_copy['face_encoding'] = base64.b64encode(face_encoding_bytes).decode('utf-8')
+                for field in ENCODING_FIELDS:
+                    if field in student_copy:
+                        face_encoding_bytes = pickle.dumps(student_copy[field])
+                        student_copy[field] = base64.b64encode(face_encoding_bytes).decode('utf-8')
                 data_copy["students"].append(student_copy)
 
             # Save to file
@@ -65,38 +78,103 @@ class HostelDatabase:
         """Save data before closing"""
         self.save_data()
 
-    def add_student(self, roll_number, name, hostel_name, room_number, contact_number, face_encoding):
-        """Add a new student to the database"""
+    def add_change_listener(self, callback):
+        """Call callback(event, data) after every change, from the thread that made it
+
+        Events: "logs_added" with a (student_id, get_logs row) pair per new log, and
+        "logs_removed" with the ID of the student whose logs were deleted.
+        """
+        self.change_listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        """Stop calling a change listener"""
+        if callback in self.change_listeners:
+            self.change_listeners.remove(callback)
+
+    def _notify(self, event, data):
+        for callback in list(self.change_listeners):
+            callback(event, data)
+
+    @staticmethod
+    def _templates(student):
+        """Every face template of a student record, primary encoding first"""
+        return ([student["face_encoding"]]
+                + list(student.get("enrolment_encodings", []))
+                + list(student.get("learned_encodings", [])))
+
+    @staticmethod
+    def _log_row(log):
+        """Log in the get_logs row format"""
+        return (log["id"], log["action"], log["timestamp"],
+                log.get("student_name", ""),
+                log.get("roll_number", ""),
+                log.get("hostel_name", ""),
+                log.get("room_number", ""))
+
+    def add_student(self, roll_number, name, hostel_name, room_number, contact_number, face_encoding,
+                    enrolment_encodings=None):
+        """Add a new student to the database
+
+        enrolment_encodings holds further templates captured during enrolment.
+        """
+        return self.add_students([{
+            "roll_number": roll_number,
+            "name": name,
+            "hostel_name": hostel_name,
+            "room_number": room_number,
+            "contact_number": contact_number,
+            "face_encoding": face_encoding,
+            "enrolment_encodings": enrolment_encodings,
+        }])[0]
+
+    def add_students(self, students):
+        """Add several students and save once
+
+        students: dicts with roll_number, name, hostel_name, room_number,
+        contact_number, face_encoding and optionally enrolment_encodings.
+        Returns True for each student added, False for a roll number that already exists.
+        """
         with self.lock:
-            # Check if roll number already exists
-            for student in self.data["students"]:
-                if student["roll_number"] == roll_number:
-                    return False
+            existing_roll_numbers = {student["roll_number"] for student in self.data["students"]}
 
-            # Generate a unique ID
-            student_id = 1
+            # Generate unique IDs
+            next_id = 1
             if self.data["students"]:
-                student_id = max(student["id"] for student in self.data["students"]) + 1
-
-            # Create student record
-            student = {
-                "id": student_id,
-                "roll_number": roll_number,
-                "name": name,
-                "hostel_name": hostel_name,
-                "room_number": room_number,
-                "contact_number": contact_number,
-                "face_encoding": face_encoding,
-                "registration_date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-
-            # Add to students list
-            self.data["students"].append(student)
+                next_id = max(student["id"] for student in self.data["students"]) + 1
+
+            registration_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            added = []
+            for data in students:
+                # Check if roll number already exists
+                if data["roll_number"] in existing_roll_numbers:
+                    added.append(False)
+                    continue
+
+                # Create student record
+                student = {
+                    "id": next_id,
+                    "roll_number": data["roll_number"],
+                    "name": data["name"],
+                    "hostel_name": data["hostel_name"],
+                    "room_number": data["room_number"],
+                    "contact_number": data["contact_number"],
+                    "face_encoding": data["face_encoding"],
+                    "enrolment_encodings": list(data.get("enrolment_encodings") or []),
+                    "learned_encodings": [],
+                    "registration_date": registration_date
+                }
+
+                # Add to students list
+                self.data["students"].append(student)
+                existing_roll_numbers.add(data["roll_number"])
+                next_id += 1
+                added.append(True)
 
             # Save changes
-            self.save_data()
+            if any(added):
+                self.save_data()
 
-            return True
+            return added
 
     def get_all_students(self):
         """Get all students from the database"""
@@ -147,45 +225,122 @@ class HostelDatabase:
                 encodings[student["id"]] = student["face_encoding"]
             return encodings
 
-    def log_entry_exit(self, student_id, action):
-        """Log entry or exit for a student"""
-        if action not in ['entry', 'exit']:
-            raise ValueError("Action must be 'entry' or 'exit'")
+    def get_all_face_templates(self, hostel_name=None):
+        """Get every face template of every student (of one hostel if given), primary encoding first"""
+        with self.lock:
+            templates = {}
+            for student in self.data["students"]:
+                if hostel_name is not None and student["hostel_name"] != hostel_name:
+                    continue
+                templates[student["id"]] = self._templates(student)
+            return templates
 
+    def get_face_templates(self, student_id):
+        """Get every face template of one student, primary encoding first"""
         with self.lock:
-            # Get student details for the log
-            student = None
-            for s in self.data["students"]:
-                if s["id"] == student_id:
-                    student = s
-                    break
+            for student in self.data["students"]:
+                if student["id"] == student_id:
+                    return self._templates(student)
+            return []
 
-            if not student:
-                raise ValueError(f"Student with ID {student_id} not found")
+    def get_student_ids_by_hostel(self):
+        """Get the IDs of the students of every hostel"""
+        with self.lock:
+            student_ids = {}
+            for student in self.data["students"]:
+                student_ids.setdefault(student["hostel_name"], []).append(student["id"])
+            return student_ids
+
+    def add_learned_encoding(self, student_id, face_encoding, max_learned=5, save=True):
+        """Add a template learned from an accepted recognition, dropping the oldest beyond max_learned
 
-            # Generate a unique ID for the log
+        save=False leaves writing the file to a later save_data call.
+        """
+        with self.lock:
+            for student in self.data["students"]:
+                if student["id"] == student_id:
+                    learned = student.setdefault("learned_encodings", [])
+                    learned.append(face_encoding)
+                    del learned[:-max_learned]
+
+                    # Save changes
+                    if save:
+                        self.save_data()
+                    return True
+            return False
+
+    def log_entry_exit(self, student_id, action, gate=None):
+        """Log entry or exit for a student, tagged with the gate it happened at"""
+        self.log_entries([(student_id, action, gate)])
+
+    def log_entries(self, entries):
+        """Log several entries/exits and save once
+
+        entries: (student_id, action, gate) tuples. Nothing is logged if any
+        action is invalid or any student does not exist.
+        """
+        with self.lock:
+            students = {s["id"]: s for s in self.data["students"]}
+            for student_id, action, _ in entries:
+                if action not in ['entry', 'exit']:
+                    raise ValueError("Action must be 'entry' or 'exit'")
+                if student_id not in students:
+                    raise ValueError(f"Student with ID {student_id} not found")
+
+            # Generate unique IDs
             log_id = 1
             if self.data["logs"]:
                 log_id = max(log["id"] for log in self.data["logs"]) + 1
 
-            # Create log entry with more information
-            log = {
-                "id": log_id,
-                "student_id": student_id,
-                "student_name": student["name"],
-                "roll_number": student["roll_number"],
-                "hostel_name": student["hostel_name"],
-                "room_number": student["room_number"],
-                "action": action,
-                "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-
-            # Add to logs list
-            self.data["logs"].append(log)
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            added = []
+            for student_id, action, gate in entries:
+                student = students[student_id]
+
+                # Create log entry with more information
+                log = {
+                    "id": log_id,
+                    "student_id": student_id,
+                    "student_name": student["name"],
+                    "roll_number": student["roll_number"],
+                    "hostel_name": student["hostel_name"],
+                    "room_number": student["room_number"],
+                    "action": action,
+                    "gate": gate,
+                    "timestamp": timestamp
+                }
+
+                # Add to logs list
+                self.data["logs"].append(log)
+                added.append((student_id, self._log_row(log)))
+                log_id += 1
 
             # Save changes
             self.save_data()
 
+        for _, action, gate in entries:
+            LOG_ENTRIES.inc(action=action, gate=gate or "")
+        self._notify("logs_added", added)
+
+    def get_logs(self, student_id=None, before_id=None, limit=50):
+        """Get a page of logs, newest first, of one student or of everyone
+
+        Rows are (id, action, timestamp, student_name, roll_number, hostel_name,
+        room_number). before_id continues a previous page from its last row.
+        """
+        with self.lock:
+            rows = []
+            # Logs are appended in ID order, so the newest are at the end
+            for log in reversed(self.data["logs"]):
+                if before_id is not None and log["id"] >= before_id:
+                    continue
+                if student_id is not None and log["student_id"] != student_id:
+                    continue
+                rows.append(self._log_row(log))
+                if len(rows) >= limit:
+                    break
+            return rows
+
     def get_student_logs(self, student_id, limit=10):
         """Get recent entry/exit logs for a student"""
         with self.lock:
@@ -235,3 +390,5 @@ class HostelDatabase:
 
             # Save changes
             self.save_data()
+
+        self._notify("logs_removed", student_id)
@@ -1,49 +1,335 @@
-import face_recognition
 import cv2
+import tracing
 import numpy as np
 import time
 import threading
+import collections
+import queue
+from concurrent.futures import ProcessPoolExecutor
+
+from camera_manager import CameraFeed, parse_camera_source
+from capture_service import CaptureService
+from face_detectors import detect_in_region, get_detector
+from face_gallery import FaceGallery, ShardedGallery
+from face_tracker import FaceTracker, box_iou
+from identity_vote import IdentityVoter
+from lazy_modules import LazyModule
+from frame_ring import FrameRing
+from frame_sources import create_frame_source
+from frame_scheduler import AdaptiveScheduler, DetectionScaleController
+from metrics import (CAMERA_FPS, CAMERA_IDLE, CPU_PERCENT, DETECTION_SCALE, MATCH_DISTANCE,
+                     RECOGNITION_INTERVAL, RECOGNITION_LATENCY, RECOGNITION_QUEUE_DEPTH, RECOGNITIONS)
+from motion_gate import MotionGate, StateCpuMeter
+from recognition_pool import RecognitionPool, default_worker_count
+from result_writer import RecognitionResultWriter
+from tracing import NULL_TRACE, TraceRecorder
+
+# dlib and its models take seconds to load; imported on first use or by warm_up
+face_recognition = LazyModule("face_recognition")
+
+
+def locate_faces(frame, model="hog", rois=None, scale=1.0):
+    """Detect faces in an RGB frame, optionally only inside (top, right, bottom, left) ROIs
+
+    model is a detector spec from face_detectors ("hog", "haar>hog", ...).
+    scale below 1 runs detection on a shrunk copy of the frame; locations are
+    still returned in full-frame coordinates.
+    """
+    if scale != 1.0:
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        small_rois = [tuple(int(v * scale) for v in roi) for roi in rois] if rois else rois
+        return [tuple(int(round(v / scale)) for v in location)
+                for location in locate_faces(small, model, small_rois)]
+
+    detector = get_detector(model)
+    if not rois:
+        return detector.detect(frame)
+
+    face_locations = []
+    for roi in rois:
+        face_locations.extend(detect_in_region(detector, frame, roi))
+    return face_locations
+
+
+# Rings attached by recognition worker processes, keyed by shared memory name
+_attached_rings = {}
+
+
+def detect_and_encode(ring_spec, index, seq, model="hog", rois=None, scale=1.0, skip_boxes=None,
+                      iou_threshold=0.3):
+    """Detect and encode the faces in a frame ring slot (runs in recognition worker processes)
+
+    Faces overlapping one of skip_boxes (the feed's confirmed tracks) are
+    not encoded. Returns None if the slot was overwritten before or during
+    processing.
+    """
+    ring = _attached_rings.get(ring_spec[0])
+    if ring is None:
+        ring = _attached_rings[ring_spec[0]] = FrameRing.attach(ring_spec)
+
+    if not ring.is_current(index, seq):
+        return None
+
+    result = encode_frame(ring.frame(index), model, rois, scale, skip_boxes, iou_threshold)
+
+    if not ring.is_current(index, seq):
+        return None
+
+    return result
+
+
+def encode_frame(rgb_frame, model="hog", rois=None, scale=1.0, skip_boxes=None, iou_threshold=0.3):
+    """Detect and encode the faces in an RGB frame; returns (face_locations, face_encodings)
+
+    Faces overlapping one of skip_boxes by iou_threshold or more get None
+    instead of an encoding.
+    """
+    face_locations = locate_faces(rgb_frame, model, rois, scale)
+    if not face_locations:
+        return [], []
+
+    face_encodings = [None] * len(face_locations)
+    pending = [i for i, location in enumerate(face_locations)
+               if not any(box_iou(location, box) >= iou_threshold for box in skip_boxes or ())]
+    if pending:
+        encoded = face_recognition.face_encodings(rgb_frame, [face_locations[i] for i in pending])
+        for i, face_encoding in zip(pending, encoded):
+            face_encodings[i] = face_encoding
+    return face_locations, face_encodings
+
+
+def _encode_bgr_frame(frame, model="hog", rois=None):
+    """Convert a BGR frame to RGB and encode it (runs in offline worker processes)"""
+    return encode_frame(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), model, rois)
+
+
+def encode_photo(path, model="hog"):
+    """Detect and encode the single face in a photo file; returns (encoding, error message)"""
+    frame = cv2.imread(path)
+    if frame is None:
+        return None, "Could not read image"
+
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    face_locations = locate_faces(rgb_frame, model)
+
+    if not face_locations:
+        return None, "No face detected"
+
+    if len(face_locations) > 1:
+        return None, "Multiple faces detected"
+
+    return face_recognition.face_encodings(rgb_frame, face_locations)[0], None
+
 
 class FaceAuthenticator:
     def __init__(self, database):
         """Initialize the face authenticator with a database connection"""
         self.database = database
-        self.known_face_encodings = {}
-        self.known_face_ids = []
+
+        # Every template of every student, matched in one vectorized pass.
+        # gallery_prefilter ("centroid" or "medoid") first shortlists the
+        # gallery_candidates closest students by one representative each.
+        # gallery_quantization ("int8" or "pq") scans compact codes
+        # and re-ranks the gallery_rerank closest templates at full precision.
+        # gallery_sharding keeps one gallery per hostel, built on first use; a
+        # gate searches its gate_hostel first and the other hostels on a miss.
+        self.gallery_sharding = False
+        self.gallery_prefilter = None
+        self.gallery_candidates = 8
+        self.gallery_quantization = None
+        self.gallery_rerank = 16
+        self.gallery = FaceGallery()
+        self._gallery_lock = threading.Lock()  # Serializes rebuilds and learned-template updates
         self.load_known_faces()
 
         # Parameters for face recognition
-        self.face_detection_model = "hog"  # or "cnn" for better but slower detection
+        # Detector spec (see face_detectors): "hog", "cnn" (slow without a GPU),
+        # "haar", "lbp", "dnn" or a cascade such as "haar>hog"
+        self.face_detection_model = "hog"
         self.tolerance = 0.6  # Lower is more strict
-        self.frame_skip = 3  # Process every nth frame for better performance
+        self.frame_skip = 3  # Process every nth frame; the starting point when scheduling adapts
+
+        # Adaptive scheduling: the recognition interval of each camera follows the measured
+        # capture-to-result latency, between 1 and max_frame_skip frames
+        self.adaptive_scheduling = True
+        self.target_latency = 0.3  # Seconds
+        self.max_frame_skip = 30
+
+        # Detection on shrunk frames; adapted to the worker job time when enabled
+        self.detection_scale = 1.0
+        self.adaptive_detection_scale = False
+        self.min_detection_scale = 0.5
+        self._scale_controller = None
+
+        # Templates per student: a burst of frames at enrolment, plus confident
+        # recognitions that still differ enough from the stored templates. Only
+        # faces of students confirmed by the identity vote are learned; they are
+        # added to the live gallery and saved by a background thread.
+        self.enrolment_frames = 5
+        self.learn_templates = True
+        self.learn_distance_range = (0.3, 0.45)
+        self.max_learned_templates = 5
+        self.learn_interval = 3600  # Seconds between learned templates per student
+        self._last_learned = {}
+        self._learn_lock = threading.Lock()
+        self._learn_queue = queue.Queue()
+        self._learn_thread = None
+
+        # Regions of interest for detection as (top, right, bottom, left) boxes.
+        # Empty means detection runs on the whole frame.
+        self.detection_rois = []
+
+        # Track faces between frames so recognised identities are reused
+        self.use_tracking = True
+        self.tracker = FaceTracker(max_cached_distance=self.tolerance - 0.1)
+
+        self._tracker_lock = threading.Lock()
 
-        # For smoother video processing
-        self.processing_frame = False
-        self.last_recognized_student = None
-        self.last_message = "No face detected"
+        # Motion gate: detection and recognition pause while the scene is static
+        self.motion_gating = True
+        self.motion_threshold = 0.01  # Fraction of changed thumbnail pixels that counts as motion
+        self.idle_after = 2.0  # Seconds without motion or faces before idling
+        self.idle_frame_interval = 0.1  # Capture pacing while idle
+
+        # Identity vote: a student is shown once their distance-weighted votes in the
+        # last vote_window results reach vote_min_votes (1 per match, up to 2 when close)
+        self.vote_window = 5
+        self.vote_min_votes = 3.0
+
+        # Called as identity_callback(feed, students) from a worker thread whenever
+        # the voted identity of a feed changes
+        self.identity_callback = None
+
+        # Recognize every face in view instead of rejecting crowded frames
+        self.multi_face = False
+
+        # Recognition workers: "thread", or "process" to keep dlib off the capture loop's GIL
+        self.worker_mode = "thread"
+        self.num_workers = None  # Defaults to one less than the CPU count
+
+        # Captured frames live in a shared-memory ring read by index
+        self.frame_ring_slots = 16
+        self._result_lock = threading.Lock()
 
         # Camera settings
         self.camera_width = 640  # Lower resolution for better performance
         self.camera_height = 480
+        self.camera_source = 0  # Device index, video file or stream URL
+        self.gate_name = "Main Gate"
+        self.gate_direction = None  # "entry" or "exit" to log automatically (see gate_logger)
+        self.gate_hostel = None  # Hostel served by the gate, searched first when the gallery is sharded
+
+        # Long-lived capture services, one per camera device, shared by every screen
+        self.capture_services = {}
+        self._capture_lock = threading.Lock()
+
+        # Feed used by process_video_feed; holds the latest recognition result
+        self.feed = self.create_feed(self.camera_source, self.gate_name, self.tracker)
+
+        # Per-frame stage tracing, off until enable_tracing is called
+        self.tracer = None
+
+    def warm_up(self):
+        """Load the face models in a background thread so the first recognition does not wait"""
+        def load():
+            try:
+                face_recognition.load()
+                get_detector(self.face_detection_model)
+            except Exception as e:
+                print(f"Error loading face models: {e}")
+
+        thread = threading.Thread(target=load, name="model-warm-up")
+        thread.daemon = True
+        thread.start()
+        return thread
 
     def load_known_faces(self):
-        """Load known face encodings from the database"""
-        self.known_face_encodings = self.database.get_all_face_encodings()
-        self.known_face_ids = list(self.known_face_encodings.keys())
+        """Load known face templates from the database"""
+        # Build the new gallery first and swap it in, so workers never see a half-built one
+        options = dict(prefilter=self.gallery_prefilter, candidates=self.gallery_candidates,
+                       quantization=self.gallery_quantization, rerank=self.gallery_rerank)
+        # Quantizers trained for the previous gallery are reused rather than retrained
+        with self._gallery_lock:
+            if self.gallery_sharding:
+                quantizers = getattr(self.gallery, "quantizers", None)
+                self.gallery = ShardedGallery(self.database, quantizers, **options)
+            else:
+                self.gallery = FaceGallery(self.database.get_all_face_templates(),
+                                           quantizer=getattr(self.gallery, "quantizer", None), **options)
+
+    @property
+    def known_face_ids(self):
+        return self.gallery.student_ids
+
+    @property
+    def known_face_matrix(self):
+        return self.gallery.full_precision()
+
+    def enable_tracing(self, path="traces.jsonl", max_bytes=10 * 1024 * 1024, backup_count=5):
+        """Write per-frame stage timings to a rotating JSON-lines file"""
+        self.disable_tracing()
+        self.tracer = TraceRecorder(path, max_bytes, backup_count)
+
+    def disable_tracing(self):
+        """Stop tracing and flush pending traces"""
+        if self.tracer is not None:
+            self.tracer.close()
+            self.tracer = None
+
+    def set_gallery_prefilter(self, prefilter, candidates=8):
+        """Shortlist students by "centroid" or "medoid" template before exact matching, or None"""
+        self.gallery_prefilter = prefilter
+        self.gallery_candidates = candidates
+        self.load_known_faces()
+
+    def set_gallery_sharding(self, enabled):
+        """Keep one gallery per hostel and search the gate's hostel first"""
+        self.gallery_sharding = enabled
+        self.load_known_faces()
+
+    def set_gallery_quantization(self, quantization, rerank=16):
+        """Match on "int8" or "pq" codes with full-precision re-ranking, or None"""
+        self.gallery_quantization = quantization
+        self.gallery_rerank = rerank
+        self.load_known_faces()
+
+    def set_detection_rois(self, rois):
+        """Set the regions of interest that face detection is restricted to"""
+        self.detection_rois = [tuple(int(v) for v in roi) for roi in (rois or [])]
+
+    def detect_faces(self, frame):
+        """Detect faces inside the configured ROIs, in full-frame coordinates"""
+        with tracing.stage("detect"):
+            return locate_faces(frame, self.face_detection_model, self.detection_rois, self.detection_scale)
 
     def register_face(self, frame, student_data):
-        """Register a new face in the database"""
-        # Detect faces in the frame
-        face_locations = face_recognition.face_locations(frame, model=self.face_detection_model)
+        """Register a new face in the database
 
-        if not face_locations:
-            return False, "No face detected. Please look at the camera."
+        frame may also be a list of frames from an enrolment burst; every
+        usable frame becomes a template of the student.
+        """
+        frames = frame if isinstance(frame, (list, tuple)) else [frame]
+        face_encodings = []
+        message = "No face detected. Please look at the camera."
 
-        if len(face_locations) > 1:
-            return False, "Multiple faces detected. Please ensure only one person is in the frame."
+        for burst_frame in frames:
+            # Detect faces in the frame
+            face_locations = self.detect_faces(burst_frame)
+
+            if not face_locations:
+                continue
+
+            if len(face_locations) > 1:
+                message = "Multiple faces detected. Please ensure only one person is in the frame."
+                continue
+
+            # Get the face encoding
+            face_encodings.append(face_recognition.face_encodings(burst_frame, face_locations)[0])
+
+        if not face_encodings:
+            return False, message
 
-        # Get the face encoding
-        face_encoding = face_recognition.face_encodings(frame, face_locations)[0]
+        face_encoding, enrolment_encodings = self._enrolment_templates(face_encodings)
 
         # Add the student to the database
         roll_number = student_data['roll_number']
@@ -53,7 +339,8 @@ class FaceAuthenticator:
         contact_number = student_data['contact_number']
 
         success = self.database.add_student(
-            roll_number, name, hostel_name, room_number, contact_number, face_encoding
+            roll_number, name, hostel_name, room_number, contact_number, face_encoding,
+            enrolment_encodings
         )
 
         if success:
@@ -63,43 +350,289 @@ class FaceAuthenticator:
         else:
             return False, f"Student with roll number {roll_number} already exists"
 
-    def recognize_face(self, frame):
-        """Recognize a face in the frame"""
+    def _enrolment_templates(self, face_encodings):
+        """Split enrolment encodings into the primary one and the templates that match it"""
+        # Keep encodings that look like the first one (not someone walking past)
+        face_encoding = face_encodings[0]
+        enrolment_encodings = [encoding for encoding in face_encodings[1:]
+                               if np.linalg.norm(encoding - face_encoding) <= self.tolerance]
+        return face_encoding, enrolment_encodings
+
+    def register_batch(self, students, num_workers=None):
+        """Register many students from photo files in one batch
+
+        students: list of (student_data, photo_paths) pairs, where student_data
+        has the same fields as for register_face. Faces are detected and
+        encoded across worker processes and all students are saved in one
+        database commit. Returns (results, failures): a (roll_number, success,
+        message) tuple per student and a (photo_path, message) tuple per photo
+        that could not be used.
+        """
+        paths = list(dict.fromkeys(path for _, photo_paths in students for path in photo_paths))
+        num_workers = num_workers or default_worker_count()
+
+        encoded = {}
+        if paths:
+            chunksize = max(1, len(paths) // (num_workers * 4))
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                models = [self.face_detection_model] * len(paths)
+                encoded = dict(zip(paths, executor.map(encode_photo, paths, models, chunksize=chunksize)))
+
+        results = []
+        failures = []
+        records = []
+        for student_data, photo_paths in students:
+            face_encodings = []
+            for path in photo_paths:
+                face_encoding, error = encoded[path]
+                if error:
+                    failures.append((path, error))
+                else:
+                    face_encodings.append(face_encoding)
+
+            if not face_encodings:
+                results.append((student_data['roll_number'], False, "No usable photo"))
+                continue
+
+            face_encoding, enrolment_encodings = self._enrolment_templates(face_encodings)
+            records.append(dict(student_data, face_encoding=face_encoding,
+                                enrolment_encodings=enrolment_encodings))
+
+        # One database commit for the whole batch
+        for record, added in zip(records, self.database.add_students(records)):
+            if added:
+                results.append((record['roll_number'], True, f"Successfully registered {record['name']}"))
+            else:
+                results.append((record['roll_number'], False,
+                                f"Student with roll number {record['roll_number']} already exists"))
+
+        if records:
+            self.load_known_faces()
+        return results, failures
+
+    def recognize_face(self, frame, hostel=None):
+        """Recognize the single face in the frame
+
+        Returns (student, message, distance, learn_candidates); distance is
+        None when no face was matched. hostel is searched first when the
+        gallery is sharded.
+        """
         # If no known faces, return early
         if not self.known_face_ids:
-            return None, "No registered faces in the database"
+            return None, "No registered faces in the database", None, []
 
         # Detect faces in the frame
-        face_locations = face_recognition.face_locations(frame, model=self.face_detection_model)
+        face_locations = self.detect_faces(frame)
 
         if not face_locations:
-            return None, "No face detected"
+            return None, "No face detected", None, []
 
         if len(face_locations) > 1:
-            return None, "Multiple faces detected"
-
-        # Get the face encoding
-        face_encoding = face_recognition.face_encodings(frame, face_locations)[0]
-
-        # Compare with known faces
-        matches = []
-        for student_id, known_encoding in self.known_face_encodings.items():
-            # Compare faces
-            match = face_recognition.compare_faces([known_encoding], face_encoding, tolerance=self.tolerance)[0]
-            if match:
-                # Calculate face distance (lower is better)
-                face_distance = face_recognition.face_distance([known_encoding], face_encoding)[0]
-                matches.append((student_id, face_distance))
-
-        if not matches:
-            return None, "Face not recognized"
+            return None, "Multiple faces detected", None, []
+
+        results, distances, learn_candidates = self._recognize_locations(frame, face_locations, hostel=hostel)
+        student, message, _ = results[0]
+        return student, message, distances[0], learn_candidates
+
+    def recognize_tracked_face(self, frame, tracker=None, hostel=None):
+        """Recognize the single face in the frame, reusing the identity cached on its track
+
+        Returns (student, message, distance, learn_candidates) like
+        recognize_face; a cached identity yields the distance it was
+        recognized at and no learn candidates.
+        """
+        tracker = tracker or self.tracker
+        if not self.known_face_ids:
+            return None, "No registered faces in the database", None, []
+
+        face_locations = self.detect_faces(frame)
+        tracks = self._update_tracks(face_locations, tracker)
+
+        if not face_locations:
+            return None, "No face detected", None, []
+
+        if len(face_locations) > 1:
+            return None, "Multiple faces detected", None, []
+
+        results, distances, learn_candidates = self._recognize_locations(frame, face_locations, tracks, tracker,
+                                                                         hostel=hostel)
+        student, message, _ = results[0]
+        return student, message, distances[0], learn_candidates
+
+    def recognize_faces(self, frame, tracker=None, hostel=None):
+        """Recognize every face in the frame
+
+        Returns (results, message, distances, learn_candidates): a
+        (student, message, face_location) tuple and a match distance per
+        detected face, an overall status message, and the matches that could
+        become new templates.
+        """
+        tracker = tracker or self.tracker
+        if not self.known_face_ids:
+            return [], "No registered faces in the database", [], []
+
+        face_locations = self.detect_faces(frame)
+        tracks = self._update_tracks(face_locations, tracker) if self.use_tracking else None
+
+        if not face_locations:
+            return [], "No face detected", [], []
+
+        results, distances, learn_candidates = self._recognize_locations(frame, face_locations, tracks, tracker,
+                                                                         hostel=hostel)
+        return results, self._results_message(results), distances, learn_candidates
 
-        # Get the best match (lowest distance)
-        best_match = min(matches, key=lambda x: x[1])
-        student_id, face_distance = best_match
+    def _results_message(self, results):
+        """Build the overall status message for a multi-face result"""
+        names = [student[2] for student, _, _ in results if student]
+        if not names:
+            return "Face not recognized"
+
+        return f"Recognized: {', '.join(names)}"
+
+    def _update_tracks(self, face_locations, tracker):
+        """Update a tracker; workers may call this concurrently"""
+        with self._tracker_lock:
+            return tracker.update(face_locations)
+
+    def _recognize_locations(self, frame, face_locations, tracks=None, tracker=None, face_encodings=None,
+                             hostel=None):
+        """Recognize faces at known locations, encoding all uncached faces in one call
+
+        Returns (results, distances, learn_candidates): a (student, message,
+        face_location) tuple and a match distance per location, and a
+        (student_id, encoding, distance) tuple per match that could become a
+        new template once the identity vote confirms the student.
+
+        face_encodings may hold encodings already computed for every location,
+        in which case the frame is not needed; a None encoding marks a face
+        the worker skipped as belonging to a confirmed track. hostel is
+        searched first when the gallery is sharded.
+        """
+        results = [None] * len(face_locations)
+        distances = [None] * len(face_locations)
+        learn_candidates = []
+
+        # Reuse identities cached on tracks, collect the rest for encoding
+        pending = []
+        for index, face_location in enumerate(face_locations):
+            track = tracks[index] if tracks else None
+            if track is not None and tracker.has_valid_identity(track):
+                results[index] = (track.student, track.message, face_location)
+                distances[index] = track.distance
+            elif face_encodings is not None and face_encodings[index] is None:
+                # Skipped by the worker, but its track was re-verified or lost
+                # meanwhile; the next frame encodes it again
+                if track is not None and track.student is not None:
+                    results[index] = (track.student, track.message, face_location)
+                    distances[index] = track.distance
+                else:
+                    results[index] = (None, "Face not recognized", face_location)
+            else:
+                pending.append(index)
+
+        if not pending:
+            return results, distances, learn_candidates
+
+        # Encode all new faces in a single call
+        if face_encodings is None:
+            with tracing.stage("encode"):
+                pending_encodings = face_recognition.face_encodings(frame, [face_locations[i] for i in pending])
+        else:
+            pending_encodings = [face_encodings[i] for i in pending]
+
+        with tracing.stage("match"):
+            matches = self._match_encodings(pending_encodings, hostel)
+
+        for index, face_encoding, (student_id, face_distance) in zip(pending, pending_encodings, matches):
+            student, message = self._student_result(student_id)
+            results[index] = (student, message, face_locations[index])
+            distances[index] = face_distance
+
+            low, high = self.learn_distance_range
+            if student and low <= face_distance <= high:
+                learn_candidates.append((student_id, face_encoding, face_distance))
+
+            if tracks:
+                if student:
+                    tracks[index].set_identity(student, message, face_distance)
+                else:
+                    tracks[index].clear_identity()
+
+        return results, distances, learn_candidates
+
+    def _match_encodings(self, face_encodings, hostel=None):
+        """Match encodings against the gallery as one batch
+
+        Returns a (student_id, distance) pair per encoding; student_id is None
+        when the closest known face is outside the tolerance.
+        """
+        if self.gallery_sharding:
+            matches = self.gallery.match(face_encodings, self.tolerance, hostel)
+        else:
+            matches = self.gallery.match(face_encodings, self.tolerance)
+        for _, face_distance in matches:
+            MATCH_DISTANCE.observe(face_distance)
+        return matches
+
+    def _queue_learned_templates(self, students, learn_candidates):
+        """Hand the learning candidates of students confirmed by the vote to the background learner
+
+        At most one template per student is learned every learn_interval seconds.
+        """
+        if not self.learn_templates or not learn_candidates:
+            return
+
+        confirmed = {student[0] for student in students}
+        now = time.time()
+        for student_id, face_encoding, _ in learn_candidates:
+            if student_id not in confirmed:
+                continue
+            with self._learn_lock:
+                if now - self._last_learned.get(student_id, 0) < self.learn_interval:
+                    continue
+                self._last_learned[student_id] = now
+                if self._learn_thread is None:
+                    self._learn_thread = threading.Thread(target=self._learn_loop, name="template-learner")
+                    self._learn_thread.daemon = True
+                    self._learn_thread.start()
+            self._learn_queue.put((student_id, face_encoding))
+
+    def _learn_loop(self):
+        while True:
+            templates = [self._learn_queue.get()]
+            # Templates queued meanwhile are saved with the same database write
+            while True:
+                try:
+                    templates.append(self._learn_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                for student_id, face_encoding in templates:
+                    self._learn_template(student_id, face_encoding)
+                self.database.save_data()
+            except Exception as e:
+                print(f"Error storing learned templates: {e}")
+
+    def _learn_template(self, student_id, face_encoding):
+        """Add a learned template to the student in the database and the live gallery"""
+        if not self.database.add_learned_encoding(student_id, face_encoding, self.max_learned_templates,
+                                                  save=False):
+            return
+
+        # Only this student's rows change, so the gallery is updated rather than rebuilt
+        templates = self.database.get_face_templates(student_id)
+        with self._gallery_lock:
+            self.gallery = self.gallery.with_templates(student_id, templates)
+
+    def _student_result(self, student_id):
+        """Look up a matched student and build the status message"""
+        if student_id is None:
+            return None, "Face not recognized"
 
         # Get student details
-        student = self.database.get_student_by_id(student_id)
+        with tracing.stage("lookup"):
+            student = self.database.get_student_by_id(student_id)
 
         if not student:
             return None, "Student not found in database"
@@ -108,119 +641,463 @@ class FaceAuthenticator:
 
     def process_video_feed(self, frame_callback, stop_event):
         """Process video feed for face recognition"""
-        # Initialize webcam
-        cap = cv2.VideoCapture(0)
+        # Tracks from a previous session are stale
+        self.tracker.reset()
+        self.feed = self.create_feed(self.camera_source, self.gate_name, self.tracker)
+
+        # Recognition runs on a fixed worker pool to keep the UI responsive
+        pool = self.create_recognition_pool()
+        pool.start()
+
+        try:
+            return self.run_feed(self.feed, frame_callback, stop_event, pool)
+        finally:
+            pool.stop()
 
-        if not cap.isOpened():
-            return "Error: Could not open webcam"
+    def create_feed(self, source=None, gate=None, tracker=None, direction=None, hostel=None):
+        """Create a camera feed, with its own tracker unless one is given"""
+        if source is None:
+            source = self.camera_source
+        if direction is None:
+            direction = self.gate_direction
+        if hostel is None:
+            hostel = self.gate_hostel
+        if tracker is None:
+            tracker = FaceTracker(max_cached_distance=self.tolerance - 0.1)
+        scheduler = AdaptiveScheduler(self.frame_skip, self.target_latency, max_interval=self.max_frame_skip,
+                                      adaptive=self.adaptive_scheduling)
+        return CameraFeed(source, gate, tracker, self.create_voter(), scheduler, direction, hostel)
 
-        # Set camera properties for better performance
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.camera_width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.camera_height)
-        cap.set(cv2.CAP_PROP_FPS, 30)  # Request 30fps if supported
+    def create_voter(self):
+        """Create an identity voter with the configured window"""
+        return IdentityVoter(self.vote_window, self.vote_min_votes, self.tolerance)
+
+    def create_recognition_pool(self, num_feeds=1):
+        """Create the recognition worker pool for the configured worker mode"""
+        if self.worker_mode == "process":
+            worker_fn = detect_and_encode
+        else:
+            worker_fn = self._recognize_slot
+
+        # Room for the latest frame of every feed
+        pool = RecognitionPool(worker_fn, self._apply_result, num_workers=self.num_workers,
+                               mode=self.worker_mode, queue_size=num_feeds, discard_callback=self._discard_job)
+        RECOGNITION_QUEUE_DEPTH.set_function(lambda: pool.queue_depth)
+        return pool
+
+    def run_feed(self, feed, frame_callback, stop_event, pool):
+        """Capture frames from one camera and submit them to a shared recognition pool"""
+        # Subscribe to the shared webcam, or open the video file or image directory
+        cap = self.open_frame_source(feed.source)
+
+        if not cap.open():
+            return f"Error: Could not open camera {feed.source}"
 
         # For tracking frame rate
         frame_count = 0
         last_time = time.time()
         fps = 0
 
-        # Start a separate thread for face recognition to keep UI responsive
-        recognition_thread = None
+        # Preallocated buffers: capture, resize, shared frame ring and display
+        capture_buffer = None
+        resize_buffer = None
+        ring = None
+        display_frame = None
 
-        while not stop_event.is_set():
-            # Read a frame from the webcam
-            ret, frame = cap.read()
+        # Cheap motion check in front of detection, and CPU usage per state
+        motion_gate = MotionGate(min_changed=self.motion_threshold,
+                                 idle_after=self.idle_after) if self.motion_gating else None
+        feed.idle = False
+        feed.cpu = StateCpuMeter()
 
-            if not ret:
-                break
+        tracer = self.tracer
 
-            # Always draw face locations for visual feedback
-            self.draw_face_locations(frame)
+        try:
+            while not stop_event.is_set():
+                trace = tracer.new_trace("frame", feed.gate, feed.frame_seq + 1) if tracer else NULL_TRACE
+                tracing.activate(trace)
 
-            # Calculate and display FPS
-            current_time = time.time()
-            if current_time - last_time >= 1.0:  # Update FPS every second
-                fps = frame_count / (current_time - last_time)
-                frame_count = 0
-                last_time = current_time
+                # Read a frame from the webcam, reusing the capture buffer
+                with trace.stage("capture"):
+                    ret, capture_buffer = cap.read(capture_buffer)
+                captured_at = time.monotonic()
 
-            # Add FPS display to frame
-            cv2.putText(frame, f"FPS: {fps:.1f}", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                if not ret:
+                    break
 
-            # Process every nth frame for face recognition
-            if frame_count % self.frame_skip == 0 and not self.processing_frame:
-                # Set flag to prevent multiple recognition threads
-                self.processing_frame = True
+                if ring is None:
+                    # Slots of queued and running jobs are pinned, so leave room for all of them
+                    slots = max(self.frame_ring_slots, pool.num_workers + pool.queue.maxsize + 2)
+                    ring = FrameRing(capture_buffer.shape, slots)
+                    display_frame = np.empty_like(capture_buffer)
 
-                # Make a copy of the frame for processing
-                process_frame = frame.copy()
+                # The ring keeps the first frame's size; later frames of another size are
+                # scaled to it (a changed camera mode or mixed image sizes)
+                source_frame = capture_buffer
+                feed.frames_captured += 1
+                if capture_buffer.shape != ring.frame_shape:
+                    if capture_buffer.shape[2:] != ring.frame_shape[2:]:
+                        feed.frames_dropped += 1
+                        continue  # Channel count differs; cannot be converted into the ring
+                    if resize_buffer is None:
+                        resize_buffer = np.empty(ring.frame_shape, dtype=np.uint8)
+                    height, width = ring.frame_shape[:2]
+                    source_frame = cv2.resize(capture_buffer, (width, height), dst=resize_buffer,
+                                              interpolation=cv2.INTER_AREA)
+                    feed.frames_resized += 1
 
-                # Start recognition in a separate thread
-                if recognition_thread is not None and recognition_thread.is_alive():
-                    recognition_thread.join(0.01)  # Wait briefly for previous thread
+                # Convert BGR to RGB once, straight into the ring slot
+                index, frame = ring.next_slot()
+                if index is None:
+                    feed.frames_dropped += 1
+                    continue  # Every slot is still read by recognition jobs
+                feed.frame_seq += 1
+                seq = feed.frame_seq
+                with trace.stage("convert"):
+                    cv2.cvtColor(source_frame, cv2.COLOR_BGR2RGB, dst=frame)
+                    ring.commit(index, seq)
 
-                recognition_thread = threading.Thread(
-                    target=self._process_frame,
-                    args=(process_frame, frame_callback)
-                )
-                recognition_thread.daemon = True
-                recognition_thread.start()
+                # Skip detection and recognition while nothing moves; wake on the first changed frame
+                with trace.stage("motion"):
+                    active = motion_gate is None or motion_gate.update(frame)
+                if not active and not feed.idle:
+                    with self._result_lock:
+                        feed.voter.reset()
+                        if feed.last_recognized_students:
+                            self._publish_identity(feed, [])
+                feed.idle = not active
 
-            # Always update the display with the current frame
-            frame_callback(frame, self.last_recognized_student, self.last_message)
+                # Overlays go on the display buffer so recognition sees the clean frame
+                with trace.stage("overlay"):
+                    np.copyto(display_frame, frame)
 
-            frame_count += 1
+                    # Draw face locations for visual feedback while active
+                    if active:
+                        face_locations = self.draw_face_locations(display_frame, rgb_frame=frame)
 
-            # Small delay to reduce CPU usage but keep UI responsive
-            time.sleep(0.005)
+                        # Someone standing still at the kiosk keeps the pipeline awake
+                        if face_locations and motion_gate is not None:
+                            motion_gate.mark_active()
 
-        # Release the webcam
-        cap.release()
+                # Calculate and display FPS
+                current_time = time.time()
+                if current_time - last_time >= 1.0:  # Update FPS every second
+                    fps = frame_count / (current_time - last_time)
+                    feed.fps = fps
+                    CAMERA_FPS.set(fps, gate=feed.gate)
+                    CAMERA_IDLE.set(int(feed.idle), gate=feed.gate)
+                    RECOGNITION_INTERVAL.set(feed.scheduler.interval, gate=feed.gate)
+                    if feed.scheduler.latency is not None:
+                        RECOGNITION_LATENCY.set(feed.scheduler.latency, gate=feed.gate)
+                    DETECTION_SCALE.set(self.detection_scale)
+                    for state in ("active", "idle"):
+                        CPU_PERCENT.set(feed.cpu.percent(state), gate=feed.gate, state=state)
+                    frame_count = 0
+                    last_time = current_time
+
+                # Add FPS display to frame
+                cv2.putText(display_frame, f"FPS: {fps:.1f}" + (" (idle)" if feed.idle else ""), (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+                # The scheduler picks which frames go to recognition; a newer frame from this
+                # feed replaces a queued one
+                if active and feed.scheduler.should_submit():
+                    feed.frames_submitted += 1
+                    job_trace = tracer.new_trace("recognition", feed.gate, seq) if tracer else NULL_TRACE
+                    # The slot stays pinned until the job's result or discard callback
+                    ring.pin(index)
+                    tag = (feed, seq, job_trace, captured_at, pool, ring, index)
+                    if self.worker_mode == "process":
+                        # Faces of confirmed tracks reuse their identity, so the worker skips encoding them
+                        skip_boxes = None
+                        if self.use_tracking:
+                            with self._tracker_lock:
+                                skip_boxes = feed.tracker.confirmed_boxes()
+                        pool.submit(tag, ring.spec, index, seq, self.face_detection_model, self.detection_rois,
+                                    self.detection_scale, skip_boxes, feed.tracker.iou_threshold, key=feed)
+                    else:
+                        pool.submit(tag, feed, ring, index, seq, job_trace, key=feed)
+
+                # Always update the display with the current frame (RGB)
+                if frame_callback is not None:
+                    with trace.stage("display"):
+                        frame_callback(display_frame, feed.last_recognized_student, feed.last_message,
+                                       students=feed.last_recognized_students, trace=trace)
+
+                frame_count += 1
+                if tracer:
+                    tracer.record(trace)
+
+                # Live reads already wait for the next frame, so only idle cameras are paced:
+                # polled less often, still fast enough to wake on motion
+                if cap.realtime and feed.idle:
+                    time.sleep(self.idle_frame_interval)
+
+                feed.cpu.tick("idle" if feed.idle else "active")
+        finally:
+            # Also on errors, so a dead feed never keeps its capture subscription or ring
+            tracing.activate(None)
+            CAMERA_FPS.remove(gate=feed.gate)
+            CAMERA_IDLE.remove(gate=feed.gate)
+            RECOGNITION_INTERVAL.remove(gate=feed.gate)
+            RECOGNITION_LATENCY.remove(gate=feed.gate)
+            for state in ("active", "idle"):
+                CPU_PERCENT.remove(gate=feed.gate, state=state)
+
+            # Release the webcam; the frame ring is freed once no worker can still read it
+            if ring is not None:
+                pool.after_stop(ring.close)
+            cap.release()
         return "Video feed stopped"
 
-    def _process_frame(self, frame, frame_callback):
-        """Process a single frame for face recognition (runs in a separate thread)"""
+    def process_offline(self, source, output_path, num_workers=None):
+        """Recognize every frame of a video file or image directory as fast as possible
+
+        Detection and encoding run across worker processes; matching runs here
+        in frame order. Results go to output_path (.csv, otherwise JSON lines).
+        Returns the number of frames processed.
+        """
+        frame_source = create_frame_source(source)
+        if not frame_source.open():
+            raise ValueError(f"Could not open frame source {source}")
+
+        num_workers = num_workers or default_worker_count()
+        writer = RecognitionResultWriter(output_path)
+        frames_processed = 0
+
+        # Keep a bounded number of frames in flight so long videos are not buffered whole
+        in_flight = collections.deque()
+
+        def write_next():
+            frame_index, frame_name, future = in_flight.popleft()
+            face_locations, face_encodings = future.result()
+            if not face_locations:
+                message = "No face detected"
+                results = []
+            elif not self.known_face_ids:
+                message = "No registered faces in the database"
+                results = [(None, message, location) for location in face_locations]
+            else:
+                results, _, _ = self._recognize_locations(None, face_locations, face_encodings=face_encodings,
+                                                          hostel=self.gate_hostel)
+                message = self._results_message(results)
+            writer.write(frame_index, frame_name, results, message)
+
         try:
-            # Convert BGR to RGB (face_recognition uses RGB)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                while True:
+                    ret, frame = frame_source.read()
+                    if not ret:
+                        break
+
+                    future = executor.submit(_encode_bgr_frame, frame,
+                                             self.face_detection_model, self.detection_rois)
+                    in_flight.append((frames_processed, frame_source.frame_name, future))
+                    frames_processed += 1
 
-            # Detect and recognize faces
-            student, message = self.recognize_face(rgb_frame)
+                    if len(in_flight) >= num_workers * 2:
+                        write_next()
 
-            # Update the last recognized student and message
-            self.last_recognized_student = student
-            self.last_message = message
+                while in_flight:
+                    write_next()
         finally:
-            # Clear the processing flag
-            self.processing_frame = False
+            frame_source.release()
+            writer.close()
+
+        return frames_processed
+
+    def _recognize_slot(self, feed, ring, index, seq, trace=NULL_TRACE):
+        """Recognize faces in a frame ring slot
+
+        Returns the _recognize_frame result, or None if the slot was
+        overwritten before or during processing.
+        """
+        trace.add("queue", trace.start, time.monotonic())
+        if not ring.is_current(index, seq):
+            return None
+
+        with tracing.activated(trace):
+            result = self._recognize_frame(ring.frame(index), feed.tracker, feed.hostel)
+
+        if not ring.is_current(index, seq):
+            return None
+
+        return result
+
+    def _recognize_frame(self, rgb_frame, tracker=None, hostel=None):
+        """Recognize faces in an RGB frame
+
+        Returns ((student, message, students, distances), learn_candidates),
+        the shape _apply_result expects from either worker mode.
+        """
+        # Detect and recognize faces
+        if self.multi_face:
+            results, message, distances, learn_candidates = self.recognize_faces(rgb_frame, tracker, hostel)
+            return self._multi_face_result(results, message, distances), learn_candidates
+
+        if self.use_tracking:
+            student, message, distance, learn_candidates = self.recognize_tracked_face(rgb_frame, tracker, hostel)
+        else:
+            student, message, distance, learn_candidates = self.recognize_face(rgb_frame, hostel)
+        return self._single_face_result(student, message, distance), learn_candidates
+
+    def _single_face_result(self, student, message, distance):
+        """Wrap a single-face result in the (student, message, students, distances) shape"""
+        return student, message, [student] if student else [], [distance] if student else []
+
+    def _multi_face_result(self, results, message, distances):
+        """Collect the recognized students of a multi-face result with their distances"""
+        recognized = [(result[0], distance) for result, distance in zip(results, distances) if result[0]]
+        students = [student for student, _ in recognized]
+        return (students[0] if students else None), message, students, [d for _, d in recognized]
+
+    def _recognize_encoded(self, face_locations, face_encodings, tracker, hostel=None):
+        """Finish recognition for faces detected and encoded in a worker process
+
+        Returns ((student, message, students, distances), learn_candidates)
+        like _recognize_frame.
+        """
+        if not self.known_face_ids:
+            return (None, "No registered faces in the database", [], []), []
+
+        tracks = self._update_tracks(face_locations, tracker) if self.use_tracking else None
+
+        if not face_locations:
+            return (None, "No face detected", [], []), []
 
-    def draw_face_locations(self, frame):
-        """Draw rectangles around detected faces"""
+        if len(face_locations) > 1 and not self.multi_face:
+            return (None, "Multiple faces detected", [], []), []
+
+        results, distances, learn_candidates = self._recognize_locations(None, face_locations, tracks, tracker,
+                                                                         face_encodings, hostel=hostel)
+
+        if self.multi_face:
+            return self._multi_face_result(results, self._results_message(results), distances), learn_candidates
+
+        student, message, _ = results[0]
+        return self._single_face_result(student, message, distances[0]), learn_candidates
+
+    def _apply_result(self, tag, result):
+        """Publish a worker result unless a newer frame of the same feed was already published"""
+        feed, seq, trace, captured_at, pool, ring, index = tag
+        ring.unpin(index)
+        with self._result_lock:
+            if result is None or seq <= feed.last_result_seq:
+                # Still measured, so an overloaded pool whose results all go stale backs off
+                feed.stale_results += 1
+                self._adapt_to_latency(feed, captured_at, pool)
+                return
+            feed.last_result_seq = seq
+            feed.results += 1
+
+            if self.worker_mode == "process":
+                # Queue wait plus detection and encoding in the worker process
+                trace.add("worker", trace.start, time.monotonic())
+                with tracing.activated(trace):
+                    result = self._recognize_encoded(*result, feed.tracker, feed.hostel)
+            result, learn_candidates = result
+
+            # Vote over recent results; the published identity only changes when the vote does
+            student, message, students, distances = result
+            if feed.voter.update(students, distances):
+                self._publish_identity(feed, feed.voter.students)
+
+            # Faces only become templates of students the vote has published
+            self._queue_learned_templates(feed.voter.students, learn_candidates)
+            if not feed.last_recognized_students:
+                feed.last_message = message
+
+            self._adapt_to_latency(feed, captured_at, pool)
+
+        RECOGNITIONS.inc(gate=feed.gate, outcome="recognized" if students else "unrecognized")
+        if self.tracer is not None:
+            self.tracer.record(trace)
+
+    def _adapt_to_latency(self, feed, captured_at, pool):
+        """Adapt the recognition interval (and detection scale) to the measured latency"""
+        feed.scheduler.record(time.monotonic() - captured_at, pool.service_time)
+        if self.adaptive_detection_scale:
+            if self._scale_controller is None:
+                self._scale_controller = DetectionScaleController(self.target_latency,
+                                                                  self.min_detection_scale)
+            self.detection_scale = self._scale_controller.update(pool.service_time)
+
+    def _discard_job(self, tag):
+        """Release the ring slot of a job that was dropped or failed"""
+        ring, index = tag[5], tag[6]
+        ring.unpin(index)
+
+    def _publish_identity(self, feed, students):
+        """Publish a new identity decision for a feed; the caller holds the result lock"""
+        feed.last_recognized_student = students[0] if students else None
+        feed.last_recognized_students = students
+        if students:
+            feed.last_message = f"Recognized: {', '.join(student[2] for student in students)}"
+        else:
+            feed.last_message = "No face detected"
+        feed.identity_changes += 1
+
+        if self.identity_callback is not None:
+            self.identity_callback(feed, list(students))
+
+    def draw_face_locations(self, frame, rgb_frame=None):
+        """Draw rectangles around detected faces and return their locations
+
+        rgb_frame may be passed when an RGB version of the frame already exists.
+        """
         # Convert BGR to RGB (face_recognition uses RGB)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if rgb_frame is None:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
         # Detect faces
-        face_locations = face_recognition.face_locations(rgb_frame, model=self.face_detection_model)
+        face_locations = self.detect_faces(rgb_frame)
+
+        # Outline the detection regions so the kiosk area is visible
+        for (top, right, bottom, left) in self.detection_rois:
+            cv2.rectangle(frame, (left, top), (right, bottom), (255, 255, 255), 1)
 
         # Draw rectangles around faces
         for (top, right, bottom, left) in face_locations:
             cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
 
+        return face_locations
+
+    def capture_service(self, source=None):
+        """Get the shared capture service of a camera device, creating it on first use"""
+        source = parse_camera_source(self.camera_source if source is None else source)
+        with self._capture_lock:
+            service = self.capture_services.get(source)
+            if service is None:
+                service = CaptureService(source, self.camera_width, self.camera_height)
+                self.capture_services[source] = service
+            return service
+
+    def open_frame_source(self, source=None):
+        """Frame source for a camera device (shared), video file, stream or image directory"""
+        source = parse_camera_source(self.camera_source if source is None else source)
+        if isinstance(source, int):
+            return self.capture_service(source).subscribe()
+        return create_frame_source(source, self.camera_width, self.camera_height)
+
+    def release_cameras(self):
+        """Stop every capture service and release the devices"""
+        with self._capture_lock:
+            services = list(self.capture_services.values())
+            self.capture_services = {}
+        for service in services:
+            service.stop()
+
     def capture_single_frame(self):
         """Capture a single frame from the webcam"""
-        cap = cv2.VideoCapture(0)
+        cap = self.open_frame_source()
 
-        if not cap.isOpened():
+        if not cap.open():
             return None, "Error: Could not open webcam"
 
-        # Wait for the camera to initialize
-        time.sleep(0.5)
-
-        # Read a frame
+        # Read a frame; a shared camera is already running, so there is no warm-up
         ret, frame = cap.read()
 
-        # Release the webcam
+        # Unsubscribe from (or release) the webcam
         cap.release()
 
         if not ret:
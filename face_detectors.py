@@ -0,0 +1,200 @@
+"""
+Face detector backends for the hostel management system.
+Every backend returns (top, right, bottom, left) boxes for an RGB frame, so
+the dlib detectors used by face_recognition can be swapped for OpenCV's
+cascade classifiers or its DNN face detector, or combined so a cheap
+detector proposes regions and an expensive one confirms them.
+
+Detectors are named by a spec string, which is what the recognition workers
+receive, so each process builds its own detector:
+
+    hog, cnn                  dlib via face_recognition
+    haar[:PATH]               OpenCV Haar cascade (bundled frontal face model by default)
+    lbp[:PATH]                OpenCV LBP cascade (models/ or the system OpenCV data by default)
+    dnn[:MODEL[,CONFIG]]      OpenCV DNN res10 SSD from local model files
+    PROPOSER>CONFIRMER        cascade, e.g. haar>hog
+"""
+
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from face_tracker import box_iou
+from lazy_modules import LazyModule
+
+face_recognition = LazyModule("face_recognition")
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+LBP_CASCADE_FILE = "lbpcascade_frontalface_improved.xml"
+DEFAULT_DNN_MODEL = os.path.join(MODEL_DIR, "res10_300x300_ssd_iter_140000.caffemodel")
+DEFAULT_DNN_CONFIG = os.path.join(MODEL_DIR, "deploy.prototxt")
+
+
+def detect_in_region(detector, rgb_frame, region):
+    """Run detector on a (top, right, bottom, left) region of a frame
+
+    The region is clamped to the frame; boxes are returned in full-frame
+    coordinates.
+    """
+    height, width = rgb_frame.shape[:2]
+    top, right, bottom, left = region
+    top, left = max(0, top), max(0, left)
+    bottom, right = min(height, bottom), min(width, right)
+    if bottom <= top or right <= left:
+        return []
+
+    # dlib needs a contiguous buffer, so the crop is copied once here
+    crop = np.ascontiguousarray(rgb_frame[top:bottom, left:right])
+    return [(f_top + top, f_right + left, f_bottom + top, f_left + left)
+            for (f_top, f_right, f_bottom, f_left) in detector.detect(crop)]
+
+
+class DlibDetector:
+    """dlib HOG or CNN detector from face_recognition"""
+
+    def __init__(self, model="hog", upsample=1):
+        self.model = model
+        self.upsample = upsample
+
+    def detect(self, rgb_frame):
+        """Face boxes in an RGB frame"""
+        return face_recognition.face_locations(rgb_frame, number_of_times_to_upsample=self.upsample,
+                                               model=self.model)
+
+
+class CascadeClassifierDetector:
+    """OpenCV Haar or LBP cascade classifier; fast on a CPU but less accurate than HOG"""
+
+    def __init__(self, cascade_path=None, scale_factor=1.1, min_neighbors=5, min_size=(40, 40)):
+        # OpenCV 5 moved cascade classifiers out of the main package
+        if not hasattr(cv2, "CascadeClassifier"):
+            raise ValueError("Cascade classifiers need OpenCV 4 or opencv-contrib-python")
+        if cascade_path is None:
+            cascade_path = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.classifier = cv2.CascadeClassifier(cascade_path)
+        if self.classifier.empty():
+            raise ValueError(f"Could not load cascade classifier from {cascade_path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    def detect(self, rgb_frame):
+        """Face boxes in an RGB frame"""
+        gray = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2GRAY)
+        faces = self.classifier.detectMultiScale(gray, scaleFactor=self.scale_factor,
+                                                 minNeighbors=self.min_neighbors, minSize=self.min_size)
+        return [(int(y), int(x + w), int(y + h), int(x)) for (x, y, w, h) in faces]
+
+
+class DnnDetector:
+    """OpenCV DNN face detector (the res10 300x300 SSD) loaded from local model files"""
+
+    def __init__(self, model_path=None, config_path=None, confidence=0.5, input_size=(300, 300)):
+        model_path = model_path or DEFAULT_DNN_MODEL
+        config_path = config_path or DEFAULT_DNN_CONFIG
+        for path in (model_path, config_path):
+            if not os.path.exists(path):
+                raise ValueError(f"DNN face detector file not found: {path}")
+
+        self.net = cv2.dnn.readNet(model_path, config_path)
+        self.confidence = confidence
+        self.input_size = input_size
+        self._lock = threading.Lock()  # A network must not run forward passes concurrently
+
+    def detect(self, rgb_frame):
+        """Face boxes in an RGB frame"""
+        height, width = rgb_frame.shape[:2]
+        # The model was trained on BGR input with these channel means
+        blob = cv2.dnn.blobFromImage(rgb_frame, 1.0, self.input_size, (104.0, 177.0, 123.0), swapRB=True)
+        with self._lock:
+            self.net.setInput(blob)
+            detections = self.net.forward()
+
+        boxes = []
+        for detection in detections.reshape(-1, 7):
+            if detection[2] < self.confidence:
+                continue
+            left, top, right, bottom = (detection[3:7] * [width, height, width, height]).astype(int)
+            top, left = max(0, top), max(0, left)
+            bottom, right = min(height, bottom), min(width, right)
+            if bottom > top and right > left:
+                boxes.append((int(top), int(right), int(bottom), int(left)))
+        return boxes
+
+
+class CascadeDetector:
+    """Cheap detector proposes face regions, an expensive one confirms faces inside them"""
+
+    def __init__(self, proposer, confirmer, padding=0.5):
+        self.proposer = proposer
+        self.confirmer = confirmer
+        self.padding = padding  # Proposal box size added on each side before confirming
+
+    def detect(self, rgb_frame):
+        """Face boxes in an RGB frame"""
+        boxes = []
+        for (top, right, bottom, left) in self.proposer.detect(rgb_frame):
+            pad_y = int((bottom - top) * self.padding)
+            pad_x = int((right - left) * self.padding)
+            region = (top - pad_y, right + pad_x, bottom + pad_y, left - pad_x)
+            for box in detect_in_region(self.confirmer, rgb_frame, region):
+                # Overlapping proposals confirm the same face more than once
+                if all(box_iou(box, other) < 0.5 for other in boxes):
+                    boxes.append(box)
+        return boxes
+
+
+def default_lbp_cascade():
+    """Path of the LBP frontal face cascade in models/ or next to OpenCV's Haar cascades
+
+    pip builds of OpenCV only ship Haar cascades, so raises ValueError when
+    the file has to be downloaded first.
+    """
+    candidates = [os.path.join(MODEL_DIR, LBP_CASCADE_FILE)]
+    haar_dir = getattr(getattr(cv2, "data", None), "haarcascades", None)
+    if haar_dir:
+        # System installs keep lbpcascades/ beside haarcascades/
+        candidates.append(os.path.join(os.path.dirname(os.path.normpath(haar_dir)), "lbpcascades",
+                                       LBP_CASCADE_FILE))
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    raise ValueError(f"LBP cascade not found: download {LBP_CASCADE_FILE} from OpenCV's "
+                     f"data/lbpcascades into {MODEL_DIR}, or use lbp:PATH")
+
+
+def create_detector(spec):
+    """Build the detector named by a spec string (see the module docstring)"""
+    if ">" in spec:
+        proposer, confirmer = spec.split(">", 1)
+        return CascadeDetector(create_detector(proposer), create_detector(confirmer))
+
+    name, _, argument = spec.partition(":")
+    if name in ("hog", "cnn"):
+        return DlibDetector(name)
+    if name == "haar":
+        return CascadeClassifierDetector(argument or None)
+    if name == "lbp":
+        return CascadeClassifierDetector(argument or default_lbp_cascade())
+    if name == "dnn":
+        paths = argument.split(",") if argument else []
+        return DnnDetector(*paths)
+    raise ValueError(f"Unknown face detector: {spec}")
+
+
+# Detectors built in this process, keyed by spec
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def get_detector(spec):
+    """The detector for a spec, built once per process"""
+    detector = _detectors.get(spec)
+    if detector is None:
+        with _detectors_lock:
+            detector = _detectors.get(spec)
+            if detector is None:
+                detector = _detectors[spec] = create_detector(spec)
+    return detector
@@ -0,0 +1,434 @@
+"""
+Face gallery for the hostel management system.
+Stacks every face template of every student into one matrix so a probe is
+matched against all of them in a single vectorized operation, optionally
+narrowed first by one representative template (centroid or medoid) per student.
+A sharded gallery keeps one such gallery per hostel, built on first use.
+
+The matrix can be quantized (int8 or product-quantized codes) to cut
+memory and scan time; the closest candidates of the compact scan are then
+re-ranked against the full-precision templates.
+"""
+
+import copy
+import threading
+
+import numpy as np
+
+PREFILTERS = ("centroid", "medoid")
+QUANTIZATIONS = ("int8", "pq")
+
+# Rows cast to float32 at a time while scanning int8 codes
+SCAN_BLOCK_ROWS = 2048
+
+
+def pairwise_distances(encodings, matrix, sq_norms):
+    """Euclidean distances between every encoding and every matrix row"""
+    # ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab, computed for all pairs at once
+    sq_distances = (np.einsum('ij,ij->i', encodings, encodings)[:, None]
+                    + sq_norms[None, :]
+                    - 2.0 * encodings @ matrix.T)
+    return np.sqrt(np.maximum(sq_distances, 0.0))
+
+
+class ScalarQuantizer:
+    """Per-dimension scaled int8 codes, scanned in float32 blocks"""
+
+    def __init__(self, matrix):
+        """Fit the int8 scale to matrix"""
+        self.trained_rows = len(matrix)
+        self.scale = np.abs(matrix).max(axis=0) / 127.0
+        self.scale[self.scale == 0] = 1.0
+        self.scale = self.scale.astype(np.float32)
+
+    def encode(self, matrix):
+        """Codes of the matrix rows"""
+        # Rows added after training may fall outside the fitted range
+        return np.clip(np.round(matrix / self.scale), -127, 127).astype(np.int8)
+
+    def _block(self, codes, start):
+        return codes[start:start + SCAN_BLOCK_ROWS].astype(np.float32) * self.scale
+
+    def sq_norms(self, codes):
+        """Squared norms of the decoded rows, needed by sq_distances"""
+        sq_norms = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_BLOCK_ROWS):
+            block = self._block(codes, start)
+            sq_norms[start:start + len(block)] = np.einsum('ij,ij->i', block, block)
+        return sq_norms
+
+    @property
+    def nbytes(self):
+        return self.scale.nbytes
+
+    def sq_distances(self, encodings, codes, sq_norms):
+        """Approximate squared distances between every encoding and every code"""
+        encodings = encodings.astype(np.float32)
+        # (q * scale) . c equals q . (scale * c), so codes are only cast, never rescaled
+        probes = encodings * self.scale
+        sq_distances = np.empty((len(encodings), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_BLOCK_ROWS):
+            block = codes[start:start + SCAN_BLOCK_ROWS].astype(np.float32)
+            sq_distances[:, start:start + len(block)] = -2.0 * probes @ block.T
+        sq_distances += np.einsum('ij,ij->i', encodings, encodings)[:, None]
+        sq_distances += sq_norms[None, :]
+        return sq_distances
+
+
+class ProductQuantizer:
+    """Product quantization: each subvector is stored as the index of its closest k-means centroid"""
+
+    def __init__(self, matrix, subspaces=8, centroids=256, iterations=10, training_rows=16384, seed=0):
+        """Train the codebooks with k-means on a sample of matrix"""
+        self.subspaces = subspaces
+        self.width = matrix.shape[1] // subspaces
+        self.trained_rows = len(matrix)
+        rng = np.random.default_rng(seed)
+
+        sample = matrix[rng.choice(len(matrix), min(training_rows, len(matrix)), replace=False)]
+        centroids = min(centroids, len(sample))
+
+        self.codebooks = np.empty((subspaces, centroids, self.width), dtype=np.float32)
+        for m in range(subspaces):
+            vectors = sample[:, m * self.width:(m + 1) * self.width].astype(np.float32)
+            codebook = vectors[rng.choice(len(vectors), centroids, replace=False)]
+            for _ in range(iterations):
+                assignment = self._assign(vectors, codebook)
+                counts = np.bincount(assignment, minlength=centroids)
+                sums = np.stack([np.bincount(assignment, vectors[:, d], centroids)
+                                 for d in range(self.width)], axis=1)
+                filled = counts > 0  # Empty clusters keep their previous centroid
+                codebook[filled] = sums[filled] / counts[filled, None]
+            self.codebooks[m] = codebook
+
+    @staticmethod
+    def _assign(vectors, codebook):
+        sq_norms = np.einsum('ij,ij->i', codebook, codebook)
+        return np.argmin(sq_norms[None, :] - 2.0 * vectors @ codebook.T, axis=1)
+
+    def encode(self, matrix):
+        """Codes of the matrix rows: one centroid index per subspace"""
+        codes = np.empty((len(matrix), self.subspaces), dtype=np.uint8)
+        for m in range(self.subspaces):
+            columns = slice(m * self.width, (m + 1) * self.width)
+            for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+                block = matrix[start:start + SCAN_BLOCK_ROWS, columns].astype(np.float32)
+                codes[start:start + len(block), m] = self._assign(block, self.codebooks[m])
+        return codes
+
+    def sq_norms(self, codes):
+        """Not needed: distances come straight from the lookup tables"""
+        return None
+
+    @property
+    def nbytes(self):
+        return self.codebooks.nbytes
+
+    def sq_distances(self, encodings, codes, sq_norms=None):
+        """Approximate squared distances between every encoding and every code"""
+        encodings = encodings.astype(np.float32).reshape(len(encodings), self.subspaces, self.width)
+        # Distance of each probe subvector to each centroid, then one table lookup per subspace
+        tables = ((encodings[:, :, None, :] - self.codebooks[None, :, :, :]) ** 2).sum(axis=3)
+        subspaces = np.arange(self.subspaces)
+        return np.stack([table[subspaces, codes].sum(axis=1) for table in tables])
+
+
+def create_quantizer(matrix, quantization, trained=None):
+    """Quantizer for matrix, reusing a trained one unless the gallery has since doubled"""
+    kind = ProductQuantizer if quantization == "pq" else ScalarQuantizer
+    if isinstance(trained, kind) and len(matrix) <= 2 * trained.trained_rows:
+        return trained
+    return kind(matrix)
+
+
+class FaceGallery:
+    """Templates of every student, stacked student by student"""
+
+    def __init__(self, templates=None, prefilter=None, candidates=8, quantization=None, rerank=16,
+                 quantizer=None):
+        """Build the gallery from a {student_id: [encoding, ...]} mapping
+
+        prefilter: None, "centroid" or "medoid". When set, probes are first
+        compared with one representative per student and only the templates
+        of the closest `candidates` students are searched exactly.
+        quantization: None, "int8" or "pq". When set, the gallery
+        keeps compact codes and re-ranks the `rerank` closest templates of a
+        scan against the full-precision encodings, which are referenced
+        rather than copied. quantizer is one trained for an earlier gallery;
+        it is reused so rebuilds only encode rows instead of retraining.
+        """
+        if prefilter not in (None,) + PREFILTERS:
+            raise ValueError(f"Unknown prefilter {prefilter}")
+        if quantization not in (None,) + QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantization}")
+
+        self.student_ids = []
+        self._rows = []  # Full-precision template of every row
+        blocks = []
+        counts = []
+        for student_id, encodings in (templates or {}).items():
+            rows = [np.asarray(encoding, dtype=np.float64).reshape(128) for encoding in encodings]
+            if not rows:
+                continue
+            self.student_ids.append(student_id)
+            self._rows.extend(rows)
+            blocks.append(np.array(rows))
+            counts.append(len(rows))
+
+        matrix = np.vstack(blocks) if blocks else np.empty((0, 128))
+        self.quantization = quantization
+        self.rerank = rerank
+        self.quantizer = None
+        self.codes = None
+        self.code_sq_norms = None
+        if quantization and len(matrix):
+            self.matrix = None
+            self.sq_norms = None
+            self.quantizer = create_quantizer(matrix, quantization, quantizer)
+            self.codes = self.quantizer.encode(matrix)
+            self.code_sq_norms = self.quantizer.sq_norms(self.codes)
+        else:
+            self.matrix = matrix
+            self.sq_norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+
+        # Row -> student index, and each student's first row
+        self.owners = np.repeat(np.arange(len(counts)), counts)
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+
+        self.prefilter = prefilter
+        self.candidates = candidates
+        self.representatives = None
+        self.representative_sq_norms = None
+        if prefilter and blocks:
+            self.representatives = np.array([self._representative(block) for block in blocks])
+            self.representative_sq_norms = np.einsum('ij,ij->i', self.representatives, self.representatives)
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    @property
+    def template_count(self):
+        return len(self._rows)
+
+    @property
+    def nbytes(self):
+        """Memory held by the matching structures (not the referenced full-precision templates)"""
+        if self.quantizer is not None:
+            scan = self.quantizer.nbytes + self.codes.nbytes
+            scan += self.code_sq_norms.nbytes if self.code_sq_norms is not None else 0
+        else:
+            scan = self.matrix.nbytes + self.sq_norms.nbytes
+        representatives = self.representatives.nbytes if self.representatives is not None else 0
+        return scan + representatives + self.owners.nbytes
+
+    def full_precision(self, rows=None):
+        """Full-precision templates of the given rows (all rows by default)"""
+        if self.matrix is not None:
+            return self.matrix if rows is None else self.matrix[rows]
+        if rows is None:
+            rows = range(len(self._rows))
+        return np.array([self._rows[row] for row in rows]).reshape(-1, 128)
+
+    def with_templates(self, student_id, encodings):
+        """Copy of the gallery with one student's templates replaced, or the student added
+
+        Only that student's rows are encoded; the quantizer is kept as it is.
+        """
+        rows = [np.asarray(encoding, dtype=np.float64).reshape(128) for encoding in encodings]
+        block = np.array(rows).reshape(-1, 128)
+        counts = list(np.diff(self.offsets))
+
+        gallery = copy.copy(self)
+        if student_id in self.student_ids:
+            index = self.student_ids.index(student_id)
+            start, end = self.offsets[index], self.offsets[index + 1]
+            counts[index] = len(rows)
+        else:
+            index = len(self.student_ids)
+            start = end = len(self._rows)
+            gallery.student_ids = self.student_ids + [student_id]
+            counts.append(len(rows))
+
+        def splice(array, new):
+            return np.concatenate((array[:start], new, array[end:]))
+
+        gallery._rows = self._rows[:start] + rows + self._rows[end:]
+        if self.quantizer is not None:
+            codes = self.quantizer.encode(block)
+            gallery.codes = splice(self.codes, codes)
+            if self.code_sq_norms is not None:
+                gallery.code_sq_norms = splice(self.code_sq_norms, self.quantizer.sq_norms(codes))
+        else:
+            gallery.matrix = splice(self.matrix, block)
+            gallery.sq_norms = splice(self.sq_norms, np.einsum('ij,ij->i', block, block))
+
+        gallery.owners = np.repeat(np.arange(len(counts)), counts)
+        gallery.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+
+        if self.prefilter and rows:
+            representatives = self.representatives if self.representatives is not None else np.empty((0, 128))
+            if index == len(representatives):
+                representatives = np.vstack((representatives, self._representative(block)))
+            else:
+                representatives = representatives.copy()
+                representatives[index] = self._representative(block)
+            gallery.representatives = representatives
+            gallery.representative_sq_norms = np.einsum('ij,ij->i', representatives, representatives)
+        return gallery
+
+    def _representative(self, block):
+        if len(block) == 1:
+            return block[0]
+        if self.prefilter == "centroid":
+            return block.mean(axis=0)
+
+        # Medoid: the template with the smallest total distance to the others
+        sq_norms = np.einsum('ij,ij->i', block, block)
+        return block[np.argmin(pairwise_distances(block, block, sq_norms).sum(axis=1))]
+
+    def match(self, encodings, tolerance):
+        """Match encodings against the gallery
+
+        Returns a (student_id, distance) pair per encoding, using each
+        student's closest template; student_id is None when that distance is
+        outside the tolerance.
+        """
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+
+        if self.representatives is not None and len(self.student_ids) > self.candidates:
+            best_rows, best_distances = self._match_prefiltered(encodings)
+        elif self.quantizer is not None:
+            best_rows, best_distances = self._match_quantized(encodings)
+        else:
+            distances = pairwise_distances(encodings, self.matrix, self.sq_norms)
+            best_rows = np.argmin(distances, axis=1)
+            best_distances = distances[np.arange(len(encodings)), best_rows]
+
+        matches = []
+        for row, face_distance in zip(best_rows, best_distances):
+            face_distance = float(face_distance)
+            if face_distance <= tolerance:
+                matches.append((self.student_ids[self.owners[row]], face_distance))
+            else:
+                matches.append((None, face_distance))
+        return matches
+
+    def _match_prefiltered(self, encodings):
+        # Shortlist students by their representative, then search their templates exactly
+        coarse = pairwise_distances(encodings, self.representatives, self.representative_sq_norms)
+        shortlist = np.argpartition(coarse, self.candidates - 1, axis=1)[:, :self.candidates]
+
+        best_rows = np.empty(len(encodings), dtype=np.intp)
+        best_distances = np.empty(len(encodings))
+        for i, students in enumerate(shortlist):
+            rows = np.concatenate([np.arange(self.offsets[s], self.offsets[s + 1]) for s in students])
+            best_rows[i], best_distances[i] = self._closest_row(encodings[i], rows)
+        return best_rows, best_distances
+
+    def _match_quantized(self, encodings):
+        # Scan the compact codes, then re-rank the closest rows at full precision
+        sq_distances = self.quantizer.sq_distances(encodings, self.codes, self.code_sq_norms)
+        count = min(self.rerank, sq_distances.shape[1])
+        shortlist = np.argpartition(sq_distances, count - 1, axis=1)[:, :count]
+
+        best_rows = np.empty(len(encodings), dtype=np.intp)
+        best_distances = np.empty(len(encodings))
+        for i, rows in enumerate(shortlist):
+            best_rows[i], best_distances[i] = self._closest_row(encodings[i], rows)
+        return best_rows, best_distances
+
+    def _closest_row(self, encoding, rows):
+        """Exact distance search of one encoding over a few rows; returns (row, distance)"""
+        matrix = self.full_precision(rows)
+        sq_norms = self.sq_norms[rows] if self.sq_norms is not None else np.einsum('ij,ij->i', matrix, matrix)
+        distances = pairwise_distances(encoding[None, :], matrix, sq_norms)[0]
+        best = np.argmin(distances)
+        return rows[best], distances[best]
+
+
+class ShardedGallery:
+    """One FaceGallery per hostel, searched home hostel first and built on first use"""
+
+    def __init__(self, database, quantizers=None, **options):
+        """Create the gallery; options are passed on to every shard's FaceGallery
+
+        quantizers: {hostel: quantizer} trained for the shards of an earlier gallery
+        """
+        self.database = database
+        self.options = options
+        self.quantizers = dict(quantizers or {})
+        self.hostel_student_ids = database.get_student_ids_by_hostel()
+        self.student_ids = [student_id for ids in self.hostel_student_ids.values() for student_id in ids]
+        self.shards = {}
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.home_matches = 0
+        self.fallback_searches = 0
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    @property
+    def template_count(self):
+        return sum(self.shard(hostel).template_count for hostel in self.hostel_student_ids)
+
+    @property
+    def nbytes(self):
+        """Memory held by the shards built so far"""
+        return sum(shard.nbytes for shard in list(self.shards.values()))
+
+    def shard(self, hostel):
+        """The gallery of one hostel, built from the database on first use"""
+        shard = self.shards.get(hostel)
+        if shard is None:
+            with self._lock:
+                shard = self.shards.get(hostel)
+                if shard is None:
+                    shard = FaceGallery(self.database.get_all_face_templates(hostel),
+                                        quantizer=self.quantizers.get(hostel), **self.options)
+                    self.quantizers[hostel] = shard.quantizer
+                    self.shards[hostel] = shard
+        return shard
+
+    def with_templates(self, student_id, encodings):
+        """Replace one student's templates in their hostel's shard, if it is built; returns self"""
+        for hostel, student_ids in self.hostel_student_ids.items():
+            if student_id in student_ids:
+                with self._lock:
+                    shard = self.shards.get(hostel)
+                    if shard is not None:
+                        self.shards[hostel] = shard.with_templates(student_id, encodings)
+                break
+        return self
+
+    def full_precision(self):
+        """Full-precision templates of every shard, in student_ids order"""
+        return np.vstack([self.shard(hostel).full_precision() for hostel in self.hostel_student_ids])
+
+    def match(self, encodings, tolerance, home=None):
+        """Match encodings against the home hostel's shard, then the other shards on a miss
+
+        Returns a (student_id, distance) pair per encoding like FaceGallery.match.
+        Without a home hostel every shard is searched.
+        """
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+        matches = [(None, float("inf"))] * len(encodings)
+        pending = list(range(len(encodings)))
+
+        if home in self.hostel_student_ids and len(self.shard(home)):
+            matches = self.shard(home).match(encodings, tolerance)
+            pending = [i for i, (student_id, _) in enumerate(matches) if student_id is None]
+            self.home_matches += len(encodings) - len(pending)
+            if not pending:
+                return matches
+            self.fallback_searches += len(pending)
+
+        # Keep the closest match over the remaining shards
+        for hostel in self.hostel_student_ids:
+            if hostel == home or not len(self.shard(hostel)):
+                continue
+            for i, match in zip(pending, self.shard(hostel).match(encodings[pending], tolerance)):
+                if match[1] < matches[i][1]:
+                    matches[i] = match
+        return matches
@@ -0,0 +1,148 @@
+"""
+Lightweight face tracker for the hostel management system.
+Associates face detections across frames so a recognised identity can be
+reused until the face leaves the frame instead of re-encoding it every time.
+"""
+
+import itertools
+
+
+def box_iou(box_a, box_b):
+    """Intersection over union of two (top, right, bottom, left) boxes"""
+    top = max(box_a[0], box_b[0])
+    right = min(box_a[1], box_b[1])
+    bottom = min(box_a[2], box_b[2])
+    left = max(box_a[3], box_b[3])
+
+    intersection = max(0, right - left) * max(0, bottom - top)
+    if intersection == 0:
+        return 0.0
+
+    area_a = (box_a[1] - box_a[3]) * (box_a[2] - box_a[0])
+    area_b = (box_b[1] - box_b[3]) * (box_b[2] - box_b[0])
+    return intersection / float(area_a + area_b - intersection)
+
+
+def box_centroid(box):
+    """Centre point (x, y) of a (top, right, bottom, left) box"""
+    top, right, bottom, left = box
+    return ((left + right) / 2.0, (top + bottom) / 2.0)
+
+
+class Track:
+    """A face followed across frames, with an optional cached identity"""
+
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = box
+        self.misses = 0  # Consecutive updates without a matching detection
+
+        # Cached recognition result
+        self.student = None
+        self.message = None
+        self.distance = None
+        self.updates_since_verify = 0
+
+    def set_identity(self, student, message, distance):
+        """Cache a recognition result for this track"""
+        self.student = student
+        self.message = message
+        self.distance = distance
+        self.updates_since_verify = 0
+
+    def clear_identity(self):
+        """Forget the cached recognition result"""
+        self.student = None
+        self.message = None
+        self.distance = None
+        self.updates_since_verify = 0
+
+
+class FaceTracker:
+    def __init__(self, iou_threshold=0.3, max_misses=3, reverify_every=30, max_cached_distance=0.5):
+        """Initialize the tracker
+
+        iou_threshold: minimum overlap for a detection to continue a track
+        max_misses: updates a track survives without a detection before it is dropped
+        reverify_every: updates after which a cached identity is re-checked
+        max_cached_distance: only matches at least this close are cached
+        """
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.reverify_every = reverify_every
+        self.max_cached_distance = max_cached_distance
+
+        self.tracks = []
+        self._next_id = itertools.count(1)
+
+    def reset(self):
+        """Drop all tracks"""
+        self.tracks = []
+
+    def _associate(self, track, box):
+        """Score how well a detection continues a track (0 means no match)"""
+        iou = box_iou(track.box, box)
+        if iou >= self.iou_threshold:
+            return 1.0 + iou
+
+        # Fall back to centroid distance for small, fast-moving faces
+        (tx, ty), (bx, by) = box_centroid(track.box), box_centroid(box)
+        width = track.box[1] - track.box[3]
+        distance = ((tx - bx) ** 2 + (ty - by) ** 2) ** 0.5
+        if width > 0 and distance < width * 0.5:
+            return 1.0 - distance / width
+
+        return 0.0
+
+    def update(self, face_locations):
+        """Update tracks with new detections and return one track per detection"""
+        # Score every (track, detection) pair and match greedily, best first
+        candidates = []
+        for t_index, track in enumerate(self.tracks):
+            for d_index, box in enumerate(face_locations):
+                score = self._associate(track, box)
+                if score > 0:
+                    candidates.append((score, t_index, d_index))
+        candidates.sort(reverse=True)
+
+        assigned = [None] * len(face_locations)
+        used_tracks = set()
+        for score, t_index, d_index in candidates:
+            if t_index in used_tracks or assigned[d_index] is not None:
+                continue
+            track = self.tracks[t_index]
+            track.box = face_locations[d_index]
+            track.misses = 0
+            track.updates_since_verify += 1
+            assigned[d_index] = track
+            used_tracks.add(t_index)
+
+        # Age unmatched tracks and drop the ones that are lost
+        for t_index, track in enumerate(self.tracks):
+            if t_index not in used_tracks:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        # Start new tracks for unmatched detections
+        for d_index, box in enumerate(face_locations):
+            if assigned[d_index] is None:
+                track = Track(next(self._next_id), box)
+                self.tracks.append(track)
+                assigned[d_index] = track
+
+        return assigned
+
+    def confirmed_boxes(self):
+        """Boxes of tracks whose cached identity will still be valid after the next update"""
+        return [track.box for track in self.tracks
+                if self.has_valid_identity(track) and track.updates_since_verify + 1 < self.reverify_every]
+
+    def has_valid_identity(self, track):
+        """Check whether a track's cached identity can be reused without encoding"""
+        if track.student is None:
+            return False
+
+        if track.updates_since_verify >= self.reverify_every:
+            return False
+
+        return track.distance is not None and track.distance <= self.max_cached_distance
@@ -0,0 +1,64 @@
+"""
+Frame hand-over for the hostel management system GUI.
+A capture thread posts every frame into a single-slot mailbox; the Tk main
+loop takes the newest one at its own display rate. Frames posted faster than
+they are displayed replace each other, so the display never falls behind the
+camera and Tk widgets are only touched from the main thread.
+"""
+
+import threading
+
+import numpy as np
+
+
+class FrameMailbox:
+    """Single-slot, latest-frame-wins mailbox between one writer and one reader thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Triple buffering: the writer fills one buffer, one holds the newest posted
+        # frame, and the reader keeps the one it took until its next take
+        self._write_buffer = None
+        self._ready_buffer = None
+        self._read_buffer = None
+        self._info = None
+        self._pending = False
+
+        # Statistics
+        self.posted = 0
+        self.taken = 0
+        self.dropped = 0  # Replaced by a newer frame before being taken
+
+    def post(self, frame, **info):
+        """Copy frame into the mailbox, replacing a frame not yet taken; info travels with it"""
+        if self._write_buffer is None or self._write_buffer.shape != frame.shape:
+            self._write_buffer = np.empty_like(frame)
+        np.copyto(self._write_buffer, frame)
+
+        with self._lock:
+            self._write_buffer, self._ready_buffer = self._ready_buffer, self._write_buffer
+            if self._pending:
+                self.dropped += 1
+            self._info = info
+            self._pending = True
+            self.posted += 1
+
+    def take(self):
+        """Newest frame and its info as (frame, info), or None if nothing new was posted
+
+        The frame stays valid until the next call to take.
+        """
+        with self._lock:
+            if not self._pending:
+                return None
+            self._ready_buffer, self._read_buffer = self._read_buffer, self._ready_buffer
+            info = self._info
+            self._pending = False
+            self.taken += 1
+        return self._read_buffer, info
+
+    def clear(self):
+        """Drop a frame not yet taken"""
+        with self._lock:
+            self._pending = False
+            self._info = None
@@ -0,0 +1,112 @@
+"""
+Shared-memory frame ring for the hostel management system.
+Capture writes each frame into a preallocated slot once; recognition workers
+(threads or processes) and the display read the slot by index instead of
+receiving their own copies.
+"""
+
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class FrameRing:
+    def __init__(self, frame_shape, slots=16, name=None):
+        """Create a ring of `slots` frame buffers, or attach to one by name
+
+        frame_shape: (height, width, channels) of every frame
+        slots: number of frames kept before a slot is overwritten
+        name: shared memory name of an existing ring to attach to
+        """
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.owner = name is None
+
+        frame_bytes = int(np.prod(self.frame_shape))
+        # Frames first, then one int64 sequence number per slot
+        size = frame_bytes * slots + 8 * slots
+
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # Worker processes share the creator's resource tracker, so only
+            # the creating ring unlinks the block
+            self._shm = shared_memory.SharedMemory(name=name)
+
+        self.name = self._shm.name
+        self._frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8,
+                                  buffer=self._shm.buf)
+        self._seqs = np.ndarray((slots,), dtype=np.int64,
+                                buffer=self._shm.buf, offset=frame_bytes * slots)
+        if self.owner:
+            self._seqs[:] = -1
+
+        self._next_index = 0
+
+        # Slots referenced by queued or running recognition jobs are never overwritten
+        self._pins = [0] * slots
+        self._pin_lock = threading.Lock()
+
+    @property
+    def spec(self):
+        """Picklable description used to attach from another process"""
+        return (self.name, self.frame_shape, self.slots)
+
+    @classmethod
+    def attach(cls, spec):
+        """Attach to a ring created in another process"""
+        name, frame_shape, slots = spec
+        return cls(frame_shape, slots, name=name)
+
+    def next_slot(self):
+        """Claim the next unpinned slot for writing and return (index, frame buffer)
+
+        Returns (None, None) when every slot is pinned; the frame has to be dropped.
+        """
+        with self._pin_lock:
+            for offset in range(self.slots):
+                index = (self._next_index + offset) % self.slots
+                if not self._pins[index]:
+                    break
+            else:
+                return None, None
+        self._next_index = (index + 1) % self.slots
+
+        # Invalidate the slot so readers of the previous frame can tell it was reused
+        self._seqs[index] = -1
+        return index, self._frames[index]
+
+    def pin(self, index):
+        """Keep a slot from being overwritten until it is unpinned"""
+        with self._pin_lock:
+            self._pins[index] += 1
+
+    def unpin(self, index):
+        """Release a pin taken by pin"""
+        with self._pin_lock:
+            self._pins[index] -= 1
+
+    def commit(self, index, seq):
+        """Publish a written slot under its frame sequence number"""
+        self._seqs[index] = seq
+
+    def frame(self, index):
+        """Return the frame buffer of a slot (a view, not a copy)"""
+        return self._frames[index]
+
+    def is_current(self, index, seq):
+        """Check that a slot still holds the frame with the given sequence number"""
+        seqs = self._seqs
+        return seqs is not None and int(seqs[index]) == seq
+
+    def close(self):
+        """Detach from the shared memory, and free it if this ring created it"""
+        self._frames = None
+        self._seqs = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # A worker still holds a view; the mapping is freed with it
+        if self.owner:
+            self._shm.unlink()
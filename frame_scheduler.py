@@ -0,0 +1,98 @@
+"""
+Adaptive frame scheduling for the hostel management system.
+Chooses how often a camera's frames go to recognition, and optionally how far
+frames are shrunk for detection, from the latency measured while running, so
+the same settings suit a fast desktop and a slow mini-PC.
+"""
+
+import math
+import time
+
+
+class AdaptiveScheduler:
+    """Recognition interval of one camera, adjusted to a capture-to-result latency budget"""
+
+    def __init__(self, interval=3, target_latency=0.3, min_interval=1, max_interval=30,
+                 adaptive=True, smoothing=0.3, adjust_every=3):
+        """Initialize the scheduler
+
+        interval: frames between recognition jobs to start with (the fixed interval if not adaptive)
+        target_latency: seconds from capture to published result to aim for
+        smoothing: weight of the newest measurement in the latency average
+        adjust_every: results between interval adjustments
+        """
+        self.interval = interval
+        self.target_latency = target_latency
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.adaptive = adaptive
+        self.smoothing = smoothing
+        self.adjust_every = adjust_every
+
+        self.latency = None  # Smoothed capture-to-result latency in seconds
+        self._frames_since_submit = 0
+        self._results_since_adjust = 0
+
+    def should_submit(self):
+        """Call once per processed frame; True when this frame should go to recognition"""
+        self._frames_since_submit += 1
+        if self._frames_since_submit >= self.interval:
+            self._frames_since_submit = 0
+            return True
+        return False
+
+    def record(self, latency, service_time):
+        """Feed back one result's capture-to-result latency and the mean worker job time"""
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+
+        self._results_since_adjust += 1
+        if not self.adaptive or self._results_since_adjust < self.adjust_every:
+            return
+        self._results_since_adjust = 0
+
+        # Time spent waiting for a worker is what the interval controls; slow jobs on
+        # their own are left to the detection scale. Back off multiplicatively while
+        # jobs queue past the budget, and submit more often, one frame at a time,
+        # while they hardly queue at all.
+        queueing = self.latency - service_time
+        if queueing > 0.25 * self.target_latency or (self.latency > self.target_latency
+                                                      and queueing > 0.1 * self.target_latency):
+            self.interval = min(self.max_interval, max(self.interval + 1, math.ceil(self.interval * 1.5)))
+        elif queueing < 0.1 * self.target_latency:
+            self.interval = max(self.min_interval, self.interval - 1)
+
+    def stats(self):
+        """Current settings and measurements"""
+        return {
+            "recognition_interval": self.interval,
+            "recognition_latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+        }
+
+
+class DetectionScaleController:
+    """Shrinks frames for detection while worker jobs alone exceed the latency budget"""
+
+    def __init__(self, target_latency=0.3, min_scale=0.5, step=0.8, cooldown=2.0):
+        self.target_latency = target_latency
+        self.min_scale = min_scale
+        self.step = step
+        self.cooldown = cooldown  # Seconds between changes so the job time can settle
+        self.scale = 1.0
+        self._last_change = 0.0
+
+    def update(self, service_time):
+        """Adjust the scale from the mean worker job time and return it"""
+        now = time.monotonic()
+        if now - self._last_change < self.cooldown:
+            return self.scale
+
+        if service_time > 0.8 * self.target_latency and self.scale > self.min_scale:
+            self.scale = max(self.min_scale, self.scale * self.step)
+            self._last_change = now
+        elif service_time < 0.4 * self.target_latency and self.scale < 1.0:
+            self.scale = min(1.0, self.scale / self.step)
+            self._last_change = now
+        return self.scale
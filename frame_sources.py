@@ -0,0 +1,107 @@
+"""
+Frame sources for the hostel management system.
+Lets the recognition pipeline read from a webcam, a video file or stream,
+or a directory of images through one interface.
+"""
+
+import os
+
+import cv2
+
+from camera_manager import parse_camera_source
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class CaptureSource:
+    """Webcam, video file or stream read through cv2.VideoCapture"""
+
+    def __init__(self, source, width=None, height=None, fps=30):
+        self.source = parse_camera_source(source)
+        # Device indices and network streams are live; files can be read as fast as possible
+        self.realtime = isinstance(self.source, int) or "://" in str(self.source)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.position = 0
+        self._cap = None
+
+    def open(self):
+        """Open the source; returns False if it cannot be read"""
+        self._cap = cv2.VideoCapture(self.source)
+        if not self._cap.isOpened():
+            return False
+
+        # Set camera properties for better performance
+        if isinstance(self.source, int):
+            if self.width and self.height:
+                self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+                self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            self._cap.set(cv2.CAP_PROP_FPS, self.fps)  # Request 30fps if supported
+        return True
+
+    def read(self, buffer=None):
+        """Read the next BGR frame, into buffer when possible"""
+        ret, frame = self._cap.read(buffer)
+        if ret:
+            self.position += 1
+        return ret, frame
+
+    @property
+    def frame_name(self):
+        """Identifier of the last frame read"""
+        return str(self.position - 1)
+
+    def release(self):
+        """Release the underlying capture"""
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+class ImageDirectorySource:
+    """Images in a directory, read in sorted file name order"""
+
+    realtime = False
+
+    def __init__(self, directory):
+        self.source = directory
+        self.files = []
+        self.position = 0
+
+    def open(self):
+        """List the images in the directory; returns False if there are none"""
+        if not os.path.isdir(self.source):
+            return False
+
+        self.files = sorted(
+            name for name in os.listdir(self.source)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        return bool(self.files)
+
+    def read(self, buffer=None):
+        """Read the next image as a BGR frame, skipping unreadable files"""
+        while self.position < len(self.files):
+            path = os.path.join(self.source, self.files[self.position])
+            self.position += 1
+            frame = cv2.imread(path)
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    @property
+    def frame_name(self):
+        """File name of the last image read"""
+        return self.files[self.position - 1] if self.position else ""
+
+    def release(self):
+        """Nothing to release for a directory"""
+        pass
+
+
+def create_frame_source(source, width=None, height=None):
+    """Create the frame source matching a device index, file, URL or image directory"""
+    if isinstance(source, str) and os.path.isdir(source):
+        return ImageDirectorySource(source)
+    return CaptureSource(source, width, height)
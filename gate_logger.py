@@ -0,0 +1,107 @@
+"""
+Hands-free gate logging for the hostel management system.
+Logs an entry or exit as soon as a student arrives in a gate camera's voted
+identity, without a guard pressing a button. Students who stay in view are not
+logged again, and a per-student cooldown stops a student who briefly drops
+out of the decision from being logged twice.
+"""
+
+import queue
+import threading
+import time
+
+from metrics import AUTO_LOGS_SUPPRESSED
+
+
+class AutoGateLogger:
+    """Identity callback that logs each newly arrived student at the camera's direction"""
+
+    def __init__(self, database, cooldown=60.0):
+        """Initialize the logger
+
+        cooldown: seconds a student must have been out of view before they are logged again
+        """
+        self.database = database
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._last_seen = {}  # Student ID -> monotonic time they were last in a decision
+        self._present = {}  # Feed -> student IDs of its previous decision
+        self._queue = queue.Queue()
+        self._thread = None
+
+        # Statistics
+        self.logged = 0
+        self.suppressed = 0
+
+    def __call__(self, feed, students):
+        """Queue a log for every student who arrived in a new identity decision of feed
+
+        Called as the FaceAuthenticator identity_callback; feeds without a
+        direction ("entry" or "exit") are ignored.
+        """
+        if feed.direction is None:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            previous = self._present.get(feed, set())
+            current = {student[0] for student in students}
+
+            for student_id in current - previous:
+                last = self._last_seen.get(student_id)
+                if last is not None and now - last < self.cooldown:
+                    self.suppressed += 1
+                    AUTO_LOGS_SUPPRESSED.inc(gate=feed.gate)
+                    continue
+                self._queue.put((student_id, feed.direction, feed.gate))
+
+            # Students of the previous decision were in view until now, so the
+            # cooldown runs from when they leave rather than from their log
+            for student_id in previous | current:
+                self._last_seen[student_id] = now
+            self._present[feed] = current
+
+    def start(self):
+        """Start writing queued logs in the background"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, name="gate-logger")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _write_loop(self):
+        while True:
+            entries = [self._queue.get()]
+            # Logs queued meanwhile go into the same database write
+            while True:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in entries
+            entries = [entry for entry in entries if entry is not None]
+            if entries:
+                self._write(entries)
+            if stop:
+                break
+
+    def _write(self, entries):
+        try:
+            self.database.log_entries(entries)
+            self.logged += len(entries)
+        except ValueError:
+            # A student was deleted meanwhile; log the others one by one
+            for student_id, action, gate in entries:
+                try:
+                    self.database.log_entry_exit(student_id, action, gate)
+                    self.logged += 1
+                except ValueError as e:
+                    print(f"Error logging {action} automatically: {e}")
+
+    def stop(self):
+        """Write the remaining queued logs and stop"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5.0)
+            self._thread = None
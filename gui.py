@@ -1,18 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, scrolledtext
 import cv2
-from PIL import Image, ImageTk
 import threading
 import time
 import datetime
 import os
+import queue
 
 # Import custom styles and widgets
 from styles import AppStyles
 from custom_widgets import PrimaryButton, SecondaryButton, DangerButton, DefaultButton
 
-# Import NLP summary module
-from nlp_summary import ActivitySummarizer
+from frame_mailbox import FrameMailbox
+from log_view import LogTreeView
+from tracing import NULL_TRACE
+from video_panel import VideoPanel
 
 class HostelAuthGUI:
     def __init__(self, root, face_authenticator, database):
@@ -21,8 +23,8 @@ class HostelAuthGUI:
         self.face_authenticator = face_authenticator
         self.database = database
 
-        # Initialize activity summarizer
-        self.activity_summarizer = ActivitySummarizer(database)
+        # Activity summarizer, created when a summary is first shown
+        self._activity_summarizer = None
 
         # Set window title and size
         self.root.title("Hostel Face Authentication System")
@@ -45,6 +47,18 @@ class HostelAuthGUI:
         # Create a stop event for the video feed
         self.stop_event = threading.Event()
 
+        # Capture threads post frames here; the Tk main loop shows the newest
+        # one at most display_fps times a second
+        self.display_fps = 30
+        self.video_mailbox = FrameMailbox()
+        self.register_mailbox = FrameMailbox()
+        self._display_jobs = {}
+
+        # Database changes may be made by any thread; the change feed queues
+        # them and the Tk main loop applies them to the log display
+        self.database_changes = queue.SimpleQueue()
+        self.database.add_change_listener(self.queue_database_change)
+
         # Create main frames
         self.create_frames()
 
@@ -55,10 +69,27 @@ class HostelAuthGUI:
         self.video_running = False
         self.register_video_running = False
         self.current_student = None
+        self.current_students = []
+        self.shown_student_ids = None  # Identity last shown by update_frame
+        self.shown_log_filter = None  # Student ID or "all" last shown by refresh_logs
         self.captured_frame = None
+        self.captured_frames = []  # Enrolment burst; captured_frame is its first frame
 
         # Start with the main screen
         self.show_main_screen()
+        self.root.after(200, self.poll_database_changes)
+
+    def queue_database_change(self, event, data):
+        """Database change listener; called from the thread that made the change"""
+        self.database_changes.put((event, data))
+
+    @property
+    def activity_summarizer(self):
+        """Activity summarizer, imported and created on first use"""
+        if self._activity_summarizer is None:
+            from nlp_summary import ActivitySummarizer
+            self._activity_summarizer = ActivitySummarizer(self.database)
+        return self._activity_summarizer
 
     def create_frames(self):
         """Create the main frames for the GUI"""
@@ -188,6 +219,7 @@ class HostelAuthGUI:
 
         self.video_label = ttk.Label(video_bg)
         self.video_label.pack(fill=tk.BOTH, expand=True, padx=1, pady=1)
+        self.video_panel = VideoPanel(self.video_label, "video")
 
         # Status label with a distinctive style
         self.status_label = ttk.Label(self.video_frame, text="Camera not started", style="Header.TLabel")
@@ -282,7 +314,7 @@ class HostelAuthGUI:
         # Create treeview with improved styling and more columns
         columns = ("Action", "Timestamp", "Name", "Roll Number", "Hostel", "Room")
         self.log_tree = ttk.Treeview(log_tree_frame, columns=columns, show="headings",
-                                    yscrollcommand=scrollbar.set, style="Treeview")
+                                    style="Treeview")
 
         # Configure column headings and widths
         self.log_tree.heading("Action", text="Action")
@@ -305,6 +337,9 @@ class HostelAuthGUI:
         # Configure scrollbar
         scrollbar.config(command=self.log_tree.yview)
 
+        # Rows are loaded a page at a time and new logs arrive through the change feed
+        self.log_view = LogTreeView(self.log_tree, scrollbar, self.database)
+
         # Register screen widgets with improved layout
         self.register_frame = ttk.Frame(self.root, padding=AppStyles.PADDING_LARGE)
 
@@ -397,6 +432,7 @@ class HostelAuthGUI:
 
         self.register_video_label = ttk.Label(video_bg)
         self.register_video_label.pack(fill=tk.BOTH, expand=True, padx=1, pady=1)
+        self.register_video_panel = VideoPanel(self.register_video_label, "register")
 
         # Status label with improved styling
         self.register_status_label = ttk.Label(self.register_video_frame,
@@ -415,6 +451,8 @@ class HostelAuthGUI:
 
         # Reset current student
         self.current_student = None
+        self.current_students = []
+        self.shown_student_ids = None
         self.update_student_info(None)
         self.clear_logs()
 
@@ -432,11 +470,12 @@ class HostelAuthGUI:
             entry.delete(0, tk.END)
 
         # Clear register video label
-        self.register_video_label.config(image="")
+        self.register_video_panel.clear()
         self.register_status_label.config(text="Starting camera...")
 
         # Reset captured face
         self.captured_frame = None
+        self.captured_frames = []
 
         # Start registration camera feed
         self.start_register_video()
@@ -451,6 +490,11 @@ class HostelAuthGUI:
             # Reset stop event
             self.stop_event.clear()
 
+            # Show frames from the main loop as they arrive
+            self.video_mailbox.clear()
+            self.start_display("video", self.video_mailbox, self.render_video_frame,
+                               lambda: self.video_running)
+
             # Start video in a separate thread
             self.video_thread = threading.Thread(target=self.video_loop)
             self.video_thread.daemon = True
@@ -461,54 +505,102 @@ class HostelAuthGUI:
         if self.video_running:
             self.stop_event.set()
             self.video_running = False
+            self.stop_display("video")
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
             self.entry_button.config(state=tk.DISABLED)
             self.exit_button.config(state=tk.DISABLED)
 
             # Clear video label
-            self.video_label.config(image="")
+            self.video_panel.clear()
             self.status_label.config(text="Camera stopped")
 
     def video_loop(self):
         """Process video feed in a loop"""
-        self.face_authenticator.process_video_feed(self.update_frame, self.stop_event)
+        self.face_authenticator.process_video_feed(self.post_frame, self.stop_event)
+
+    def post_frame(self, frame, student, message, students=None, trace=NULL_TRACE):
+        """Hand a frame (RGB) and recognition results to the main loop (called from the video thread)"""
+        # The frame's sequence number and capture time let the render trace join its frame trace
+        self.video_mailbox.post(frame, student=student, message=message, students=students,
+                                seq=trace.seq, captured_at=trace.start)
+
+    def start_display(self, name, mailbox, render, running):
+        """Render the newest frame of mailbox from the Tk main loop until running() is False"""
+        self.stop_display(name)
+        period = 1.0 / self.display_fps
+
+        def drain():
+            if not running():
+                self._display_jobs.pop(name, None)
+                return
 
-    def update_frame(self, frame, student, message):
-        """Update the video frame and recognition results"""
-        # Convert frame to ImageTk format
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image = Image.fromarray(image)
-        photo = ImageTk.PhotoImage(image=image)
+            start = time.perf_counter()
+            item = mailbox.take()
+            if item is not None:
+                frame, info = item
+                render(frame, **info)
+
+            # Keep a steady cadence whatever the render took
+            delay = max(1, int((period - (time.perf_counter() - start)) * 1000))
+            self._display_jobs[name] = self.root.after(delay, drain)
+
+        self._display_jobs[name] = self.root.after(0, drain)
+
+    def stop_display(self, name):
+        """Stop rendering frames started by start_display"""
+        job = self._display_jobs.pop(name, None)
+        if job is not None:
+            self.root.after_cancel(job)
+
+    def render_video_frame(self, frame, student, message, students=None, seq=None, captured_at=None):
+        """Show a frame taken from the video mailbox, traced as its own render trace
+
+        The render trace has the frame's sequence number and starts when the
+        frame was captured, so its total is the capture-to-display latency.
+        """
+        tracer = self.face_authenticator.tracer
+        if tracer is None or seq is None:
+            self.update_frame(frame, student, message, students)
+            return
 
-        # Update video label
-        self.video_label.config(image=photo)
-        self.video_label.image = photo  # Keep a reference
+        trace = tracer.new_trace("render", self.face_authenticator.gate_name, seq)
+        trace.add("handover", captured_at, trace.start)  # Capture loop and mailbox wait
+        trace.start = captured_at
+        self.update_frame(frame, student, message, students, trace)
+        tracer.record(trace)
+
+    def update_frame(self, frame, student, message, students=None, trace=NULL_TRACE):
+        """Update the video frame (RGB) and recognition results"""
+        # Scale and show the frame in the reused PhotoImage
+        with trace.stage("render"):
+            self.video_panel.show(frame)
+
+            # Update status
+            self.status_label.config(text=message)
+
+        # Student info, logs and buttons only change when the voted identity does
+        students = students if students is not None else ([student] if student else [])
+        student_ids = [s[0] for s in students]
+        if student_ids == self.shown_student_ids:
+            return
+        self.shown_student_ids = student_ids
 
-        # Update status
-        self.status_label.config(text=message)
+        # Keep every student in view so several can be logged at once
+        self.current_students = students
+        self.current_student = student
 
-        # Update student info if recognized
-        if student:
-            self.current_student = student
+        with trace.stage("student_info"):
             self.update_student_info(student)
 
-            # Refresh logs based on current filter setting
+        # Refresh logs based on current filter setting
+        with trace.stage("refresh_logs"):
             self.refresh_logs()
 
-            # Enable entry/exit buttons
-            self.entry_button.config(state=tk.NORMAL)
-            self.exit_button.config(state=tk.NORMAL)
-        else:
-            # If no student is recognized but we were showing a student before
-            if self.current_student is not None:
-                self.current_student = None
-                self.update_student_info(None)
-                self.refresh_logs()  # Update logs based on filter setting
-
-            # Disable entry/exit buttons if no student recognized
-            self.entry_button.config(state=tk.DISABLED)
-            self.exit_button.config(state=tk.DISABLED)
+        # Entry/exit buttons are only enabled while a student is recognized
+        button_state = tk.NORMAL if student else tk.DISABLED
+        self.entry_button.config(state=button_state)
+        self.exit_button.config(state=button_state)
 
     def update_student_info(self, student):
         """Update the student information display"""
@@ -524,137 +616,72 @@ class HostelAuthGUI:
             for label in self.info_labels.values():
                 label.config(text="")
 
-    # Track the last log count to prevent unnecessary refreshes
-    last_log_count = 0
-    last_filter_mode = "current"
-    last_student_id = None
-
     def refresh_logs(self):
-        """Refresh logs based on the current filter setting"""
-        # Get the current filter setting
-        filter_mode = self.log_filter_var.get()
-        current_student_id = self.current_student[0] if self.current_student else None
-
-        # Check if we need to refresh based on changes
-        refresh_needed = False
-
-        # If filter mode changed, we need to refresh
-        if filter_mode != self.__class__.last_filter_mode:
-            refresh_needed = True
-            self.__class__.last_filter_mode = filter_mode
-
-        # If student changed, we need to refresh
-        if current_student_id != self.__class__.last_student_id:
-            refresh_needed = True
-            self.__class__.last_student_id = current_student_id
-
-        # If no refresh is needed, return early
-        if not refresh_needed and not self._is_log_count_changed(filter_mode, current_student_id):
-            return
+        """Show the logs selected by the filter setting and the current student
 
-        # Perform the refresh
-        if filter_mode == "current" and self.current_student:
-            # Show logs for current student only
-            self.update_logs(self.current_student[0])
-        elif filter_mode == "all" or not self.current_student:
-            # Show all logs
-            self.show_all_logs()
-
-    def _is_log_count_changed(self, filter_mode, student_id):
-        """Check if the log count has changed"""
-        if filter_mode == "current" and student_id:
-            # Count logs for the current student
-            logs = self.database.get_student_logs(student_id)
-            current_count = len(logs)
+        Only called when the filter or the identity changes; new logs reach the
+        display through the database change feed, so nothing is polled.
+        """
+        if self.log_filter_var.get() == "current" and self.current_student:
+            log_filter = self.current_student[0]
         else:
-            # Count all logs
-            logs = self.database.get_all_logs()
-            current_count = len(logs)
+            log_filter = "all"
 
-        # Check if count changed
-        if current_count != self.__class__.last_log_count:
-            self.__class__.last_log_count = current_count
-            return True
+        # Switching between students who are all filtered out changes nothing
+        if log_filter == self.shown_log_filter:
+            return
+        self.shown_log_filter = log_filter
 
-        return False
+        if log_filter == "all":
+            self.show_all_logs()
+        else:
+            self.update_logs(log_filter)
 
     def update_logs(self, student_id):
         """Update the logs display for a student"""
-        # Clear existing logs
-        self.clear_logs()
-
-        # Get logs for the student
-        logs = self.database.get_student_logs(student_id)
-
-        # Add logs to the treeview with all available information
-        for log_entry in logs:
-            # Unpack the log entry
-            if len(log_entry) >= 6:  # New format with more details
-                action, timestamp, name, roll_number, hostel, room = log_entry
-            elif len(log_entry) >= 2:  # Old format with just action and timestamp
-                action, timestamp = log_entry
-                name = roll_number = hostel = room = ""
-            else:
-                continue  # Skip invalid log entries
-
-            # Insert into treeview with all columns
-            self.log_tree.insert("", "end", values=(
-                action.capitalize(),
-                timestamp,
-                name,
-                roll_number,
-                hostel,
-                room
-            ))
+        self.log_view.show(student_id)
 
     def show_all_logs(self):
         """Show logs for all students"""
-        # Clear existing logs
-        self.clear_logs()
-
-        # Get all logs
-        logs = self.database.get_all_logs()
-
-        # Add logs to the treeview
-        for log_entry in logs:
-            # Unpack the log entry
-            if len(log_entry) >= 6:  # New format with more details
-                action, timestamp, name, roll_number, hostel, room = log_entry
-            elif len(log_entry) >= 2:  # Old format with just action and timestamp
-                action, timestamp = log_entry
-                name = roll_number = hostel = room = ""
-            else:
-                continue  # Skip invalid log entries
-
-            # Insert into treeview with all columns
-            self.log_tree.insert("", "end", values=(
-                action.capitalize(),
-                timestamp,
-                name,
-                roll_number,
-                hostel,
-                room
-            ))
+        self.log_view.show(None)
 
     def clear_logs(self):
-        """Clear the logs display"""
-        for item in self.log_tree.get_children():
-            self.log_tree.delete(item)
+        """Clear the logs display; the next refresh_logs shows it again"""
+        self.log_view.clear()
+        self.shown_log_filter = None
+
+    def poll_database_changes(self):
+        """Apply database changes queued by the change feed to the log display"""
+        while True:
+            try:
+                event, data = self.database_changes.get_nowait()
+            except queue.Empty:
+                break
+            if event == "logs_added":
+                self.log_view.add_logs(data)
+            elif event == "logs_removed":
+                self.log_view.reload()
+
+        self.root.after(200, self.poll_database_changes)
 
     def log_entry_exit(self, action):
-        """Log an entry or exit for the current student"""
+        """Log an entry or exit for the recognized students"""
         if not self.current_student:
             messagebox.showerror("Error", "No student recognized")
             return
 
-        student_id = self.current_student[0]
-        student_name = self.current_student[2]
+        students = self.current_students or [self.current_student]
+        student_name = ", ".join(student[2] for student in students)
 
-        # Log the action
-        self.database.log_entry_exit(student_id, action)
+        # Log the action for every student in view with one validated write
+        gate = self.face_authenticator.gate_name
+        try:
+            self.database.log_entries([(student[0], action, gate) for student in students])
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
 
-        # Update logs display based on current filter setting
-        self.refresh_logs()
+        # The new rows reach the logs display through the database change feed
 
         # Update status
         self.status_label.config(text=f"{action.capitalize()} logged for {student_name}")
@@ -671,9 +698,12 @@ class HostelAuthGUI:
             self.register_stop_event = threading.Event()
             self.register_stop_event.clear()
 
-            # Flag for frame capture
-            self.capture_requested = False
-            self.current_frame = None
+            # Number of burst frames still to capture
+            self.capture_requested = 0
+
+            self.register_mailbox.clear()
+            self.start_display("register", self.register_mailbox, self.update_register_frame,
+                               lambda: self.register_video_running)
 
             # Start video in a separate thread
             self.register_video_thread = threading.Thread(target=self.register_video_loop)
@@ -685,33 +715,42 @@ class HostelAuthGUI:
         if self.register_video_running:
             self.register_stop_event.set()
             self.register_video_running = False
+            self.stop_display("register")
 
     def register_video_loop(self):
         """Process video feed for registration"""
-        # Initialize webcam
-        cap = cv2.VideoCapture(0)
+        # Subscribe to the shared webcam; it stays open between screens
+        cap = self.face_authenticator.open_frame_source()
 
-        if not cap.isOpened():
-            self.register_status_label.config(text="Error: Could not open webcam")
+        if not cap.open():
+            self.root.after(0, lambda: self.register_status_label.config(text="Error: Could not open webcam"))
             return
 
-        # Set camera properties for better performance
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.face_authenticator.camera_width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.face_authenticator.camera_height)
-        cap.set(cv2.CAP_PROP_FPS, 30)  # Request 30fps if supported
-
         # For tracking frame rate
         frame_count = 0
         last_time = time.time()
         fps = 0
 
+        # Reused capture buffer
+        frame = None
+        last_burst_time = 0
+
         while not self.register_stop_event.is_set():
             # Read a frame from the webcam
-            ret, frame = cap.read()
+            ret, frame = cap.read(frame)
 
             if not ret:
                 break
 
+            # Copy clean frames only while an enrolment burst is requested,
+            # spaced out so the templates differ in pose and expression
+            if self.capture_requested and time.time() - last_burst_time >= 0.1:
+                last_burst_time = time.time()
+                self.captured_frames.append(frame.copy())
+                self.capture_requested -= 1
+                if not self.capture_requested:
+                    self.captured_frame = self.captured_frames[0]
+
             # Draw face locations for visual feedback
             self.face_authenticator.draw_face_locations(frame)
 
@@ -726,37 +765,23 @@ class HostelAuthGUI:
             cv2.putText(frame, f"FPS: {fps:.1f}", (10, 30),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
-            # Store the current frame for capture if requested
-            self.current_frame = frame.copy()
-
-            # Check if capture was requested
-            if self.capture_requested:
-                self.captured_frame = self.current_frame.copy()
-                self.capture_requested = False
-
-            # Update the display
-            self.update_register_frame(frame)
+            # Hand the frame to the main loop for display
+            self.register_mailbox.post(frame)
 
             frame_count += 1
 
             # Small delay to reduce CPU usage but keep UI responsive
             time.sleep(0.005)
 
-        # Release the webcam
+        # Unsubscribe from the webcam
         cap.release()
 
     def update_register_frame(self, frame):
-        """Update the registration video frame"""
-        # Convert frame to ImageTk format
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image = Image.fromarray(image)
-        photo = ImageTk.PhotoImage(image=image)
-
-        # Update video label
-        self.register_video_label.config(image=photo)
-        self.register_video_label.image = photo  # Keep a reference
+        """Update the registration video frame (runs in the main loop)"""
+        # Scale and show the frame in the reused PhotoImage
+        self.register_video_panel.show(frame, bgr=True)
 
-        if not self.captured_frame:
+        if self.captured_frame is None:
             self.register_status_label.config(text="Look at the camera and click 'Capture Face'")
 
     def capture_face(self):
@@ -765,19 +790,22 @@ class HostelAuthGUI:
             messagebox.showerror("Error", "Camera is not running")
             return
 
-        # Get the current frame from the video feed
-        # We'll use a flag to request a frame capture
-        self.capture_requested = True
-
-        # Wait briefly for the frame to be captured
+        # Request a burst of frames from the video feed
         # This will be filled by the register_video_loop
         self.captured_frame = None
+        self.captured_frames = []
+        self.capture_requested = self.face_authenticator.enrolment_frames
 
-        # Try to get a frame for up to 1 second
+        # Try to get the burst for up to 2 seconds
         start_time = time.time()
-        while self.captured_frame is None and time.time() - start_time < 1.0:
+        while self.captured_frame is None and time.time() - start_time < 2.0:
             time.sleep(0.1)
 
+        # Settle for a partial burst if the camera is slow
+        if self.captured_frame is None and self.captured_frames:
+            self.capture_requested = 0
+            self.captured_frame = self.captured_frames[0]
+
         if self.captured_frame is None:
             messagebox.showerror("Error", "Could not capture frame")
             return
@@ -786,12 +814,7 @@ class HostelAuthGUI:
         self.stop_register_video()
 
         # Display the captured frame
-        image = cv2.cvtColor(self.captured_frame, cv2.COLOR_BGR2RGB)
-        image = Image.fromarray(image)
-        photo = ImageTk.PhotoImage(image=image)
-
-        self.register_video_label.config(image=photo)
-        self.register_video_label.image = photo  # Keep a reference
+        self.register_video_panel.show(self.captured_frame, bgr=True)
 
         self.register_status_label.config(text="Face captured. Click 'Save' to register.")
 
@@ -811,7 +834,7 @@ class HostelAuthGUI:
             student_data[field] = value
 
         # Register the face
-        success, message = self.face_authenticator.register_face(self.captured_frame, student_data)
+        success, message = self.face_authenticator.register_face(self.captured_frames, student_data)
 
         if success:
             messagebox.showinfo("Success", message)
@@ -828,7 +851,11 @@ class HostelAuthGUI:
         if hasattr(self, 'register_video_running') and self.register_video_running:
             self.stop_register_video()
 
+        # Release the camera devices
+        self.face_authenticator.release_cameras()
+
         # Close database connection
+        self.database.remove_change_listener(self.queue_database_change)
         self.database.close()
 
         # Destroy the window
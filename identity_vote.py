@@ -0,0 +1,65 @@
+"""
+Temporal identity voting for the hostel management system.
+Smooths per-frame recognition results over a sliding window so a single bad
+frame does not flip the displayed identity, and reports only real changes.
+"""
+
+import collections
+
+
+class IdentityVoter:
+    """Distance-weighted k-of-n vote over the last n recognition results of one camera"""
+
+    def __init__(self, window=5, min_votes=3.0, tolerance=0.6):
+        """Initialize the voter
+
+        window: number of recent results that vote
+        min_votes: weighted votes a student needs to become the decision
+        tolerance: match distance that still counts as a (weakest) vote
+        """
+        self.window = window
+        self.min_votes = min_votes
+        self.tolerance = tolerance
+        self.history = collections.deque(maxlen=window)
+        self.students = []  # Current decision, strongest first
+
+    def reset(self):
+        """Forget the history and the decision"""
+        self.history.clear()
+        self.students = []
+
+    def weight(self, distance):
+        """Vote weight of a match: 1 at the tolerance, up to 2 for an exact match"""
+        if distance is None:
+            return 1.0
+        return 1.0 + max(0.0, 1.0 - distance / self.tolerance)
+
+    def update(self, students, distances):
+        """Add one result and return True if the decision changed
+
+        students: recognized student tuples in the result
+        distances: match distance of each student (None if unknown)
+        """
+        self.history.append({student[0]: (student, self.weight(distance))
+                             for student, distance in zip(students, distances)})
+
+        scores = {}
+        latest = {}
+        for result in self.history:
+            for student_id, (student, weight) in result.items():
+                scores[student_id] = scores.get(student_id, 0.0) + weight
+                latest[student_id] = student
+
+        # Hysteresis: a student already decided on stays until their votes halve
+        current_ids = {student[0] for student in self.students}
+        decided = [
+            latest[student_id]
+            for student_id, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            if score >= (self.min_votes / 2 if student_id in current_ids else self.min_votes)
+        ]
+
+        if {student[0] for student in decided} == current_ids:
+            return False
+
+        self.students = decided
+        return True
@@ -0,0 +1,29 @@
+"""
+Deferred imports for the hostel management system.
+Heavy optional modules (dlib via face_recognition, the speech engines) are
+imported on first use instead of at startup, so the window appears before
+models load.
+"""
+
+import importlib
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        """Import the module now (imports are thread-safe) and return it"""
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
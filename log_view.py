@@ -0,0 +1,95 @@
+"""
+Activity log display for the hostel management system GUI.
+Keeps the log Treeview in step with the database by applying changes instead
+of rebuilding it: new logs from the database change feed are inserted at the
+top, and older logs are loaded a page at a time as the view is scrolled down.
+"""
+
+# Fraction of the list scrolled past after which the next page is loaded
+LOAD_MORE_AT = 0.9
+
+
+class LogTreeView:
+    """Shows one student's logs, or everyone's, newest first in a Treeview"""
+
+    def __init__(self, tree, scrollbar, database, page_size=100):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.database = database
+        self.page_size = page_size
+
+        self.showing = False  # Cleared views take no new logs
+        self.student_id = None  # None shows every student's logs
+        self.oldest_id = None  # ID of the last row loaded
+        self.exhausted = False  # All older logs are loaded
+        self._load_pending = False
+
+        # Loading older logs is driven by the scroll position
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    @staticmethod
+    def row_values(log):
+        """Treeview values of a get_logs row"""
+        _, action, timestamp, name, roll_number, hostel, room = log
+        return (action.capitalize(), timestamp, name, roll_number, hostel, room)
+
+    def show(self, student_id=None):
+        """Show the logs of student_id, or of every student if it is None"""
+        self.showing = True
+        self.student_id = student_id
+        self.reload()
+
+    def reload(self):
+        """Drop the rows and load the newest page again"""
+        if not self.showing:
+            return
+        self._remove_rows()
+        self.load_more()
+
+    def clear(self):
+        """Remove every row and show nothing until the next show"""
+        self.showing = False
+        self.student_id = None
+        self._remove_rows()
+
+    def _remove_rows(self):
+        self.tree.delete(*self.tree.get_children())
+        self.oldest_id = None
+        self.exhausted = False
+
+    def load_more(self):
+        """Append the next page of older logs"""
+        self._load_pending = False
+        if self.exhausted or not self.showing:
+            return
+        logs = self.database.get_logs(self.student_id, before_id=self.oldest_id,
+                                      limit=self.page_size)
+        for log in logs:
+            self.tree.insert("", "end", iid=str(log[0]), values=self.row_values(log))
+        if logs:
+            self.oldest_id = logs[-1][0]
+        self.exhausted = len(logs) < self.page_size
+
+    def add_logs(self, logs):
+        """Insert new logs at the top if they are shown
+
+        logs: (student_id, get_logs row) pairs, oldest first, as in the
+        database's "logs_added" change event
+        """
+        if not self.showing:
+            return
+        for student_id, log in logs:
+            if self.student_id is not None and student_id != self.student_id:
+                continue
+            if self.tree.exists(str(log[0])):
+                continue
+            self.tree.insert("", 0, iid=str(log[0]), values=self.row_values(log))
+            if self.oldest_id is None:
+                self.oldest_id = log[0]
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Load once Tk is idle rather than inserting rows from inside its scroll update
+        if float(last) >= LOAD_MORE_AT and not self.exhausted and not self._load_pending:
+            self._load_pending = True
+            self.tree.after_idle(self.load_more)
@@ -1,42 +1,164 @@
 import tkinter as tk
+import argparse
+import importlib.util
+import time
 from database import HostelDatabase
 from face_auth import FaceAuthenticator
 from gui import HostelAuthGUI
+from batch_enrol import enrol_from_csv
+from camera_manager import CameraManager, parse_camera_source, parse_camera_spec
+from gate_logger import AutoGateLogger
+from metrics import MetricsFileDumper, MetricsServer
 import sys
 import os
 
 def check_dependencies():
-    """Check if all required dependencies are installed"""
-    try:
-        # Core dependencies
-        import face_recognition
-        import cv2
-        import numpy
-        import PIL
+    """Check if all required dependencies are installed
+
+    Only looks the modules up; face_recognition is loaded later by the
+    background warm-up, so checking does not delay the window.
+    """
+    # Core dependencies
+    for module in ("face_recognition", "cv2", "numpy", "PIL"):
+        if importlib.util.find_spec(module) is None:
+            print(f"Error: Missing dependency - No module named '{module}'")
+            print("Please install all required dependencies using:")
+            print("pip install -r requirements.txt")
+            return False
 
+    return True
 
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Hostel Face Authentication System")
+    parser.add_argument("--camera", action="append", default=[], metavar="[GATE[:entry|:exit]=]SOURCE",
+                        help="Camera device index, video file or stream URL, optionally named "
+                             "after its gate and the direction it faces. Repeat to run several gates headless.")
+    parser.add_argument("--auto-log", action="store_true",
+                        help="Log entries and exits automatically at cameras given a direction")
+    parser.add_argument("--log-cooldown", type=float, default=60.0, metavar="SECONDS",
+                        help="Seconds a student must be out of view before being logged again automatically")
+    parser.add_argument("--hostel", metavar="NAME",
+                        help="Hostel served by the gate; its students are matched first and the "
+                             "others only on a miss")
+    parser.add_argument("--input", metavar="PATH",
+                        help="Process a video file or image directory offline instead of starting the GUI")
+    parser.add_argument("--output", metavar="PATH", default="recognition_results.jsonl",
+                        help="Where offline results are written (.csv or .jsonl)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes for offline processing and batch enrolment")
+    parser.add_argument("--enrol", metavar="CSV",
+                        help="Register the students listed in a CSV file from --photos, without the GUI")
+    parser.add_argument("--photos", metavar="DIR", help="Photo folder used by --enrol")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write per-frame pipeline stage timings to a rotating JSON-lines file; "
+                             "summarize it with 'python tracing.py PATH'")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Serve Prometheus metrics at http://HOST:PORT/metrics")
+    parser.add_argument("--metrics-host", default="127.0.0.1", metavar="HOST",
+                        help="Address the metrics server listens on; 0.0.0.0 lets a remote Prometheus scrape it")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="Periodically write Prometheus metrics to a file")
+    parser.add_argument("--metrics-interval", type=float, default=15.0, metavar="SECONDS",
+                        help="How often the metrics file is rewritten")
+    return parser.parse_args()
 
-        # NLP dependencies
-        import pandas
-    except ImportError as e:
-        print(f"Error: Missing dependency - {e}")
-        print("Please install all required dependencies using:")
-        print("pip install -r requirements.txt")
-        return False
+def run_gates(face_auth, cameras):
+    """Run several gate cameras headless on one shared recognition backend"""
+    manager = CameraManager(face_auth, cameras)
+    manager.start()
 
-    return True
+    try:
+        while manager.is_running():
+            time.sleep(5)
+            for stats in manager.stats():
+                print(f"[{stats['gate']}] {stats['state']} "
+                      + (f"{stats['direction']} " if stats['direction'] else "")
+                      + f"fps={stats['fps']} "
+                      f"captured={stats['frames_captured']} recognitions={stats['results']} "
+                      f"stale={stats['stale_results']} interval={stats['recognition_interval']} "
+                      f"latency={stats['recognition_latency_ms']}ms cpu active={stats['cpu_active_percent']}% "
+                      f"idle={stats['cpu_idle_percent']}%"
+                      + (f" error={stats['error']}" if stats['error'] else ""))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.stop()
 
 def main():
     """Main function to run the application"""
+    args = parse_args()
+
     # Check dependencies
     if not check_dependencies():
         sys.exit(1)
 
+    # Start metrics exporters before anything is recorded
+    if args.metrics_port:
+        try:
+            MetricsServer(args.metrics_port, args.metrics_host)
+            print(f"Serving metrics at http://{args.metrics_host}:{args.metrics_port}/metrics")
+        except OSError as e:
+            print(f"Error starting metrics server: {e}")
+    metrics_dumper = MetricsFileDumper(args.metrics_file, args.metrics_interval) if args.metrics_file else None
+
     # Initialize database
     db = HostelDatabase()
 
     # Initialize face authenticator
     face_auth = FaceAuthenticator(db)
+    if args.trace:
+        face_auth.enable_tracing(args.trace)
+    if args.hostel:
+        face_auth.gate_hostel = args.hostel
+        face_auth.set_gallery_sharding(True)
+
+    if args.enrol:
+        if not args.photos:
+            print("Error: --enrol needs --photos DIR")
+            sys.exit(1)
+        enrol_from_csv(face_auth, args.enrol, args.photos, args.workers)
+        db.close()
+        if metrics_dumper is not None:
+            metrics_dumper.stop()
+        return
+
+    if args.input:
+        start_time = time.time()
+        frames = face_auth.process_offline(args.input, args.output, args.workers)
+        elapsed = time.time() - start_time
+        print(f"Processed {frames} frames in {elapsed:.1f}s "
+              f"({frames / elapsed if elapsed else 0:.1f} fps), results in {args.output}")
+        db.close()
+        if metrics_dumper is not None:
+            metrics_dumper.stop()
+        return
+
+    cameras = [parse_camera_spec(spec) for spec in args.camera]
+
+    # Hands-free mode: stable recognitions at cameras with a direction are logged directly
+    gate_logger = None
+    if args.auto_log:
+        if not any(direction for _, _, direction in cameras):
+            print("Warning: --auto-log needs a camera given as GATE:entry=SOURCE or GATE:exit=SOURCE")
+        gate_logger = AutoGateLogger(db, args.log_cooldown)
+        face_auth.identity_callback = gate_logger
+        gate_logger.start()
+
+    if len(cameras) > 1:
+        run_gates(face_auth, cameras)
+        if gate_logger is not None:
+            gate_logger.stop()
+        db.close()
+        if metrics_dumper is not None:
+            metrics_dumper.stop()
+        return
+
+    if cameras:
+        source, gate, direction = cameras[0]
+        face_auth.camera_source = parse_camera_source(source)
+        face_auth.gate_name = gate or face_auth.gate_name
+        face_auth.gate_direction = direction
 
     # Create GUI
     root = tk.Tk()
@@ -45,8 +167,16 @@ def main():
     # Set up closing handler
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
 
+    # Load the face models once the window is up instead of before it
+    root.after(100, face_auth.warm_up)
+
     # Start the application
     root.mainloop()
 
+    if gate_logger is not None:
+        gate_logger.stop()
+    if metrics_dumper is not None:
+        metrics_dumper.stop()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,342 @@
+"""
+In-process metrics for the hostel management system.
+Counters, gauges and histograms kept in one registry and exposed in the
+Prometheus text format over a local HTTP endpoint and as a periodic file dump.
+"""
+
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + escaped + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric {self.name} expects labels {self.label_names}")
+        return tuple(labels[name] for name in self.label_names)
+
+    def render(self):
+        """Render this metric in the Prometheus text format"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a function at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function, **labels):
+        """Read the value from function() whenever the metric is rendered"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def remove(self, **labels):
+        """Forget a labelled series, e.g. when a camera is stopped"""
+        key = self._key(labels)
+        with self._lock:
+            self._values.pop(key, None)
+            self._functions.pop(key, None)
+
+    def value(self, **labels):
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def _render_samples(self):
+        with self._lock:
+            items = list(self._values.items())
+            functions = list(self._functions.items())
+
+        samples = []
+        for key, value in items:
+            samples.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        for key, function in functions:
+            try:
+                value = function()
+            except Exception:
+                continue  # A failing callback must not break the whole scrape
+            samples.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return samples
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the duration of a block in seconds"""
+        return _Timer(self, labels)
+
+    def _render_samples(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+
+        samples = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {count}")
+        return samples
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class TimedLock:
+    """Wraps a lock and records how long callers wait to acquire it"""
+
+    def __init__(self, lock, histogram):
+        self._lock = lock
+        self._histogram = histogram
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        self._histogram.observe(time.perf_counter() - start)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        """Render every metric in the Prometheus text format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Registry shared by the whole application
+REGISTRY = MetricsRegistry()
+
+# Metrics used across modules
+CAMERA_FPS = REGISTRY.gauge("hostel_camera_fps", "Frames per second captured per gate camera", ["gate"])
+CAMERA_IDLE = REGISTRY.gauge("hostel_camera_idle", "1 while a gate camera is idle (no motion)", ["gate"])
+CPU_PERCENT = REGISTRY.gauge("hostel_cpu_percent",
+                             "Average process CPU usage while a gate camera is active or idle", ["gate", "state"])
+RECOGNITION_QUEUE_DEPTH = REGISTRY.gauge("hostel_recognition_queue_depth",
+                                         "Frames waiting for a recognition worker")
+RECOGNITION_INTERVAL = REGISTRY.gauge("hostel_recognition_interval_frames",
+                                      "Frames between recognition jobs chosen by the scheduler", ["gate"])
+RECOGNITION_LATENCY = REGISTRY.gauge("hostel_recognition_latency_seconds",
+                                     "Smoothed capture-to-result recognition latency", ["gate"])
+DETECTION_SCALE = REGISTRY.gauge("hostel_detection_scale", "Scale frames are shrunk to for face detection")
+RECOGNITIONS = REGISTRY.counter("hostel_recognitions_total",
+                                "Recognition results published, by outcome", ["gate", "outcome"])
+MATCH_DISTANCE = REGISTRY.histogram("hostel_match_distance", "Distance to the closest gallery face",
+                                    buckets=(0.2, 0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.7, 0.8, 1.0))
+SAVE_DATA_SECONDS = REGISTRY.histogram("hostel_save_data_seconds", "Time spent writing the JSON database")
+DB_LOCK_WAIT_SECONDS = REGISTRY.histogram("hostel_db_lock_wait_seconds",
+                                          "Time spent waiting for the database lock",
+                                          buckets=(0.00001, 0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+LOG_ENTRIES = REGISTRY.counter("hostel_log_entries_total",
+                               "Entry/exit log entries written; use rate() for entries per hour",
+                               ["action", "gate"])
+AUTO_LOGS_SUPPRESSED = REGISTRY.counter("hostel_auto_logs_suppressed_total",
+                                       "Automatic logs skipped inside a student's cooldown window", ["gate"])
+GUI_RENDER_SECONDS = REGISTRY.histogram("hostel_gui_render_seconds",
+                                        "Time to scale, convert and show one frame in a video panel", ["panel"],
+                                        buckets=(0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1))
+GUI_IMAGE_ALLOCATIONS = REGISTRY.counter("hostel_gui_image_allocations_total",
+                                         "PhotoImages and frame buffers allocated by video panels",
+                                         ["panel", "kind"])
+VOICE_AUTH_ATTEMPTS = REGISTRY.counter("hostel_voice_auth_attempts_total",
+                                       "Voice authentication attempts, by result", ["result"])
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the console
+
+
+class MetricsServer:
+    def __init__(self, port=9108, host="127.0.0.1", registry=REGISTRY):
+        """Serve the registry at http://host:port/metrics from a background thread"""
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server")
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class MetricsFileDumper:
+    def __init__(self, path, interval=15.0, registry=REGISTRY):
+        """Periodically write the registry to a file (e.g. for a textfile collector)"""
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dump")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def dump(self):
+        """Write the current metrics atomically"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"Error writing metrics file: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=1.0)
+        self.dump()
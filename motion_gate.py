@@ -0,0 +1,92 @@
+"""
+Motion gating for the hostel management system.
+A cheap scene-change check on a downsampled grayscale copy of each frame
+decides whether face detection and recognition need to run at all, so an
+empty kiosk idles instead of running HOG on every frame.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Frame differencing on a small grayscale thumbnail of each frame"""
+
+    def __init__(self, width=80, pixel_threshold=12, min_changed=0.01, idle_after=2.0):
+        """Initialize the gate
+
+        width: thumbnail width in pixels (height follows the frame aspect ratio)
+        pixel_threshold: grey-level change that counts a thumbnail pixel as changed
+        min_changed: fraction of changed pixels that counts as motion
+        idle_after: seconds without motion or faces before the gate goes idle
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.idle_after = idle_after
+
+        self.idle = False
+        self.last_activity = time.monotonic()
+        self.changed_fraction = 0.0
+
+        # Thumbnails are preallocated on the first frame and reused
+        self._small = None
+        self._gray = None
+        self._previous = None
+        self._diff = None
+
+    def update(self, rgb_frame):
+        """Check a frame for motion; returns True if the pipeline should be active"""
+        if self._small is None:
+            height = max(1, round(rgb_frame.shape[0] * self.width / rgb_frame.shape[1]))
+            self._small = np.empty((height, self.width, 3), dtype=np.uint8)
+            self._gray = np.empty((height, self.width), dtype=np.uint8)
+            self._previous = np.empty_like(self._gray)
+            self._diff = np.empty_like(self._gray)
+            cv2.resize(rgb_frame, (self.width, height), dst=self._small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._small, cv2.COLOR_RGB2GRAY, dst=self._previous)
+            return not self.idle
+
+        # Downsample first so the colour conversion and difference touch few pixels
+        cv2.resize(rgb_frame, (self._small.shape[1], self._small.shape[0]), dst=self._small,
+                   interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_RGB2GRAY, dst=self._gray)
+        cv2.absdiff(self._gray, self._previous, dst=self._diff)
+        self._previous, self._gray = self._gray, self._previous
+
+        self.changed_fraction = np.count_nonzero(self._diff > self.pixel_threshold) / self._diff.size
+        if self.changed_fraction >= self.min_changed:
+            self.mark_active()
+        elif time.monotonic() - self.last_activity >= self.idle_after:
+            self.idle = True
+
+        return not self.idle
+
+    def mark_active(self):
+        """Keep the pipeline awake, e.g. while a face is still in view"""
+        self.last_activity = time.monotonic()
+        self.idle = False
+
+
+class StateCpuMeter:
+    """Process CPU usage attributed to the state (e.g. "idle" or "active") it was spent in"""
+
+    def __init__(self):
+        self.cpu_seconds = {}
+        self.wall_seconds = {}
+        self._last_cpu = time.process_time()
+        self._last_wall = time.monotonic()
+
+    def tick(self, state):
+        """Charge the CPU and wall time since the previous tick to state"""
+        cpu, wall = time.process_time(), time.monotonic()
+        self.cpu_seconds[state] = self.cpu_seconds.get(state, 0.0) + cpu - self._last_cpu
+        self.wall_seconds[state] = self.wall_seconds.get(state, 0.0) + wall - self._last_wall
+        self._last_cpu, self._last_wall = cpu, wall
+
+    def percent(self, state):
+        """Average CPU usage in a state, as a percentage of one core"""
+        wall = self.wall_seconds.get(state, 0.0)
+        return 100.0 * self.cpu_seconds.get(state, 0.0) / wall if wall else 0.0
@@ -2,7 +2,6 @@
 NLP module for generating natural language summaries of student activity logs.
 """
 
-import pandas as pd
 import datetime
 import random
 from collections import defaultdict, Counter
@@ -0,0 +1,210 @@
+"""
+Recognition worker pool for the hostel management system.
+Runs face recognition jobs on a fixed set of workers fed by a bounded
+latest-frame-wins queue, so stale frames are dropped instead of piling up.
+"""
+
+import collections
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def default_worker_count():
+    """Worker processes to use by default: one per CPU, leaving one for capture and the GUI"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+class LatestFrameQueue:
+    """Bounded queue that drops stale items instead of blocking the producer
+
+    An item put with a key replaces a queued item with the same key (e.g. the
+    previous frame of the same camera); otherwise the oldest item is dropped
+    when the queue is full. on_drop, if given, is called with every dropped item.
+    """
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.dropped = 0
+        self._items = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, item, key=None):
+        """Add an item, discarding a stale queued item if needed"""
+        stale = self._put(item, key)
+        if stale is not None and self.on_drop is not None:
+            self.on_drop(stale)
+
+    def _put(self, item, key):
+        # Returns the item dropped to make room, if any
+        with self._condition:
+            if key is not None:
+                for position, (queued_key, queued) in enumerate(self._items):
+                    if queued_key == key:
+                        self._items[position] = (key, item)
+                        self.dropped += 1
+                        self._condition.notify()
+                        return queued
+
+            stale = None
+            if len(self._items) >= self.maxsize:
+                stale = self._items.popleft()[1]
+                self.dropped += 1
+            self._items.append((key, item))
+            self._condition.notify()
+            return stale
+
+    def get(self):
+        """Wait for the next item; returns None once the queue is closed"""
+        with self._condition:
+            while not self._items and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return None
+            return self._items.popleft()[1]
+
+    def close(self):
+        """Wake all waiting consumers and stop handing out items"""
+        with self._condition:
+            self._closed = True
+            stale = [item for _, item in self._items]
+            self._items.clear()
+            self._condition.notify_all()
+        if self.on_drop is not None:
+            for item in stale:
+                self.on_drop(item)
+
+    @property
+    def closed(self):
+        """Whether the queue has been closed"""
+        return self._closed
+
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
+
+
+class RecognitionPool:
+    def __init__(self, worker_fn, result_callback, num_workers=None, mode="thread", queue_size=1,
+                 discard_callback=None):
+        """Initialize the pool
+
+        worker_fn: job function; must be a picklable module-level function in "process" mode
+        result_callback: called as result_callback(tag, result) for every finished job
+        discard_callback: called as discard_callback(tag) for every job dropped from the
+        queue or failed, so each submitted job ends in exactly one of the two callbacks
+        num_workers: number of workers, defaults to one less than the CPU count
+        mode: "thread" to run jobs in threads, "process" to run them in worker processes
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError("Mode must be 'thread' or 'process'")
+
+        self.worker_fn = worker_fn
+        self.result_callback = result_callback
+        self.num_workers = num_workers or default_worker_count()
+        self.mode = mode
+
+        self.discard_callback = discard_callback
+        self.queue = LatestFrameQueue(queue_size, on_drop=self._discard)
+        self.completed = 0
+        self.failed = 0
+        self.service_time = 0.0  # Smoothed seconds per job, including the process round trip
+
+        self._threads = []
+        self._executor = None
+        self._stop_callbacks = []
+        self._stopped = False
+        self._stop_lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads (and processes in process mode)"""
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.num_workers)
+
+        # One dispatcher thread per worker; in process mode each keeps one job in flight
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"recognition-{i}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, tag, *args, key=None):
+        """Queue a job
+
+        tag: passed back to result_callback, e.g. the frame sequence number
+        key: a newer job with the same key replaces this one while it is queued
+        """
+        self.queue.put((tag, args), key)
+
+    def stop(self):
+        """Stop the workers, discarding queued jobs and waiting for running ones"""
+        self.queue.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        # No job can touch the resources of the stop callbacks any more
+        with self._stop_lock:
+            self._stopped = True
+            callbacks, self._stop_callbacks = self._stop_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def after_stop(self, callback):
+        """Call callback once the pool is stopped, e.g. to free a frame ring jobs may read"""
+        with self._stop_lock:
+            if not self._stopped:
+                self._stop_callbacks.append(callback)
+                return
+        callback()
+
+    def _discard(self, job):
+        if self.discard_callback is not None:
+            self.discard_callback(job[0])
+
+    @property
+    def queue_depth(self):
+        """Number of jobs waiting for a worker"""
+        return len(self.queue)
+
+    @property
+    def dropped(self):
+        """Number of stale jobs dropped before a worker picked them up"""
+        return self.queue.dropped
+
+    def _worker_loop(self):
+        """Take jobs from the queue until the pool is stopped"""
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+
+            tag, args = job
+            started = time.monotonic()
+            try:
+                if self._executor is not None:
+                    result = self._executor.submit(self.worker_fn, *args).result()
+                else:
+                    result = self.worker_fn(*args)
+            except Exception as e:
+                self._discard(job)
+                if self.queue.closed:
+                    break  # Jobs cancelled by stop()
+                self.failed += 1
+                print(f"Recognition worker error: {e}")
+                continue
+
+            self.completed += 1
+            duration = time.monotonic() - started
+            if self.completed == 1:
+                self.service_time = duration
+            else:
+                self.service_time += 0.2 * (duration - self.service_time)
+            self.result_callback(tag, result)
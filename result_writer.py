@@ -0,0 +1,56 @@
+"""
+Recognition result writer for the hostel management system.
+Writes per-frame recognition results to a CSV or JSON-lines file.
+"""
+
+import csv
+import json
+
+
+class RecognitionResultWriter:
+    """Writes one JSON line per frame, or one CSV row per detected face"""
+
+    CSV_FIELDS = ["frame", "source", "face", "top", "right", "bottom", "left",
+                  "student_id", "roll_number", "name", "message"]
+
+    def __init__(self, path):
+        self.path = path
+        self.format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        self._file = open(path, "w", newline="")
+        self._csv = None
+
+        if self.format == "csv":
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self.CSV_FIELDS)
+
+    def write(self, frame_index, frame_name, results, message):
+        """Write the results of one frame
+
+        results: list of (student, message, face_location) tuples
+        """
+        faces = []
+        for student, face_message, (top, right, bottom, left) in results:
+            faces.append({
+                "location": [top, right, bottom, left],
+                "student_id": student[0] if student else None,
+                "roll_number": student[1] if student else None,
+                "name": student[2] if student else None,
+                "message": face_message,
+            })
+
+        if self.format == "jsonl":
+            record = {"frame": frame_index, "source": frame_name, "message": message, "faces": faces}
+            self._file.write(json.dumps(record) + "\n")
+            return
+
+        if not faces:
+            self._csv.writerow([frame_index, frame_name, "", "", "", "", "", "", "", "", message])
+        for face_index, face in enumerate(faces):
+            top, right, bottom, left = face["location"]
+            self._csv.writerow([frame_index, frame_name, face_index, top, right, bottom, left,
+                                face["student_id"] or "", face["roll_number"] or "",
+                                face["name"] or "", face["message"]])
+
+    def close(self):
+        """Flush and close the output file"""
+        self._file.close()
@@ -0,0 +1,15 @@
+import pytest
+
+from face_auth import FaceAuthenticator
+
+
+class EmptyDatabase:
+    """Database without students, for running the pipeline on plain frames"""
+
+    def get_all_face_templates(self, hostel_name=None):
+        return {}
+
+
+@pytest.fixture
+def face_auth():
+    return FaceAuthenticator(EmptyDatabase())
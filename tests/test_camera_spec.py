@@ -0,0 +1,18 @@
+from camera_manager import parse_camera_spec
+
+
+def test_gate_and_direction():
+    assert parse_camera_spec("Main Gate:entry=0") == ("0", "Main Gate", "entry")
+    assert parse_camera_spec("Back Gate=rtsp://cam/back") == ("rtsp://cam/back", "Back Gate", None)
+    assert parse_camera_spec("1") == ("1", None, None)
+
+
+def test_stream_urls_with_query_strings():
+    for url in ("rtsp://cam/stream?channel=1&subtype=0",
+                "http://10.0.0.5/video.cgi?resolution=640x480"):
+        assert parse_camera_spec(url) == (url, None, None)
+
+
+def test_gate_in_front_of_a_url_with_query_string():
+    url = "rtsp://cam/stream?channel=1&subtype=0"
+    assert parse_camera_spec(f"North:exit={url}") == (url, "North", "exit")
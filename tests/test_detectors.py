@@ -0,0 +1,32 @@
+import numpy as np
+
+from face_detectors import CascadeDetector, detect_in_region
+
+
+class FixedDetector:
+    """Reports one box in crop coordinates and remembers the crops it saw"""
+
+    def __init__(self, box):
+        self.box = box
+        self.crops = []
+
+    def detect(self, rgb_frame):
+        self.crops.append(rgb_frame)
+        return [self.box]
+
+
+def test_region_is_clamped_and_boxes_map_to_the_frame():
+    frame = np.zeros((100, 200, 3), np.uint8)
+    detector = FixedDetector((5, 25, 30, 10))
+
+    assert detect_in_region(detector, frame, (-20, 260, 80, 150)) == [(5, 175, 30, 160)]
+    crop = detector.crops[0]
+    assert crop.shape == (80, 50, 3) and crop.flags["C_CONTIGUOUS"]
+    assert detect_in_region(detector, frame, (120, 50, 150, 10)) == []
+
+
+def test_cascade_confirms_inside_padded_proposals():
+    frame = np.zeros((100, 200, 3), np.uint8)
+    cascade = CascadeDetector(FixedDetector((40, 80, 60, 60)), FixedDetector((2, 22, 22, 2)), padding=0.5)
+
+    assert cascade.detect(frame) == [(32, 72, 52, 52)]
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from frame_ring import FrameRing
+
+
+def test_pinned_slot_is_not_overwritten():
+    ring = FrameRing((4, 4, 3), slots=4)
+    try:
+        index, frame = ring.next_slot()
+        ring.commit(index, 1)
+        ring.pin(index)
+
+        for seq in range(2, 20):
+            other, _ = ring.next_slot()
+            assert other != index
+            ring.commit(other, seq)
+        assert ring.is_current(index, 1)
+
+        ring.unpin(index)
+        assert index in [ring.next_slot()[0] for _ in range(4)]
+    finally:
+        ring.close()
+
+
+def test_next_slot_reports_a_full_ring():
+    ring = FrameRing((4, 4, 3), slots=2)
+    try:
+        for seq in (1, 2):
+            index, _ = ring.next_slot()
+            ring.commit(index, seq)
+            ring.pin(index)
+        assert ring.next_slot() == (None, None)
+    finally:
+        ring.close()
+
+
+def test_slow_recognition_jobs_still_publish(face_auth, tmp_path):
+    # Far more frames than slots arrive while a single job runs
+    for i in range(60):
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), np.full((24, 32, 3), i, dtype=np.uint8))
+
+    face_auth.frame_ring_slots = 4
+    face_auth.num_workers = 2
+    face_auth.motion_gating = False
+    face_auth.adaptive_scheduling = False
+    face_auth.frame_skip = 1
+    face_auth.detect_faces = lambda frame: []
+
+    def slow_recognition(*args, **kwargs):
+        time.sleep(0.2)
+        return (None, "No face detected", [], []), []
+
+    face_auth._recognize_frame = slow_recognition
+
+    feed = face_auth.create_feed(str(tmp_path), "Test Gate")
+    pool = face_auth.create_recognition_pool()
+    pool.start()
+    try:
+        face_auth.run_feed(feed, None, threading.Event(), pool)
+    finally:
+        pool.stop()
+
+    # Without pinning every slot is overwritten before a job finishes and nothing is published
+    assert feed.results > 0
+
+
+def test_frames_of_another_size_are_resized(face_auth, tmp_path):
+    for i in range(6):
+        size = (24, 32, 3) if i % 2 == 0 else (48, 40, 3)
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), np.full(size, i, dtype=np.uint8))
+
+    face_auth.motion_gating = False
+    face_auth.adaptive_scheduling = False
+    face_auth.frame_skip = 1
+    face_auth.detect_faces = lambda frame: []
+    shapes = []
+
+    def record_shape(rgb_frame, *args, **kwargs):
+        shapes.append(rgb_frame.shape)
+        return (None, "No face detected", [], []), []
+
+    face_auth._recognize_frame = record_shape
+
+    feed = face_auth.create_feed(str(tmp_path), "Test Gate")
+    pool = face_auth.create_recognition_pool()
+    pool.start()
+    try:
+        face_auth.run_feed(feed, None, threading.Event(), pool)
+    finally:
+        pool.stop()
+
+    assert feed.frames_captured == 6
+    assert feed.frames_resized == 3
+    assert shapes and all(shape == (24, 32, 3) for shape in shapes)
@@ -0,0 +1,50 @@
+from unittest import mock
+
+from camera_manager import CameraFeed
+from gate_logger import AutoGateLogger
+
+
+def student(student_id):
+    return (student_id, "R%03d" % student_id, "Student %d" % student_id)
+
+
+def queued(logger):
+    entries = []
+    while not logger._queue.empty():
+        entries.append(logger._queue.get_nowait()[0])
+    return entries
+
+
+def test_only_newly_arrived_students_are_logged():
+    logger = AutoGateLogger(database=None, cooldown=60.0)
+    feed = CameraFeed(0, "Main Gate", direction="entry")
+
+    logger(feed, [student(1)])
+    logger(feed, [student(1), student(2)])
+    logger(feed, [student(2), student(1)])
+    assert queued(logger) == [1, 2]
+
+
+def test_cooldown_runs_from_when_a_student_leaves():
+    logger = AutoGateLogger(database=None, cooldown=60.0)
+    feed = CameraFeed(0, "Main Gate", direction="entry")
+
+    with mock.patch("gate_logger.time.monotonic") as clock:
+        clock.return_value = 0.0
+        logger(feed, [student(1)])
+        # Still in view well past the cooldown, then gone briefly
+        clock.return_value = 300.0
+        logger(feed, [student(1), student(2)])
+        clock.return_value = 310.0
+        logger(feed, [student(2)])
+        clock.return_value = 320.0
+        logger(feed, [student(1), student(2)])
+        assert queued(logger) == [1, 2]
+        assert logger.suppressed == 1
+
+        # Away for longer than the cooldown
+        clock.return_value = 330.0
+        logger(feed, [])
+        clock.return_value = 400.0
+        logger(feed, [student(1)])
+        assert queued(logger) == [1]
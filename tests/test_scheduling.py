@@ -0,0 +1,24 @@
+import time
+from types import SimpleNamespace
+
+from frame_ring import FrameRing
+
+
+def test_stale_results_still_slow_the_schedule_down(face_auth):
+    face_auth.adaptive_detection_scale = True
+    feed = face_auth.create_feed(0, "Test Gate")
+    feed.last_result_seq = 100
+    pool = SimpleNamespace(service_time=0.05)
+    ring = FrameRing((4, 4, 3), slots=2)
+    try:
+        interval = feed.scheduler.interval
+        for seq in range(1, 20):
+            ring.pin(0)
+            # Every result is older than the published one, and took two seconds
+            face_auth._apply_result((feed, seq, None, time.monotonic() - 2.0, pool, ring, 0), None)
+    finally:
+        ring.close()
+
+    assert feed.stale_results == 19
+    assert feed.scheduler.latency > 1.0
+    assert feed.scheduler.interval > interval
@@ -0,0 +1,40 @@
+import types
+
+import numpy as np
+
+import face_auth as face_auth_module
+from face_tracker import FaceTracker
+
+
+def test_worker_skips_faces_of_confirmed_tracks(monkeypatch):
+    boxes = [(10, 60, 60, 10), (10, 160, 60, 110)]
+    encoded = []
+
+    def face_encodings(frame, locations):
+        encoded.extend(locations)
+        return [np.ones(128) for _ in locations]
+
+    monkeypatch.setattr(face_auth_module, "locate_faces", lambda *args: list(boxes))
+    monkeypatch.setattr(face_auth_module, "face_recognition",
+                        types.SimpleNamespace(face_encodings=face_encodings))
+
+    locations, encodings = face_auth_module.encode_frame(np.zeros((80, 200, 3), np.uint8),
+                                                         skip_boxes=[(12, 62, 62, 12)])
+    assert locations == boxes
+    assert encoded == [boxes[1]]
+    assert encodings[0] is None and encodings[1] is not None
+
+
+def test_skipped_faces_reuse_the_track_identity(face_auth):
+    tracker = FaceTracker()
+    box = (10, 60, 60, 10)
+    track = tracker.update([box])[0]
+    student = (1, "R001", "Student 1")
+    track.set_identity(student, "Recognized", 0.3)
+    assert tracker.confirmed_boxes() == [box]
+
+    tracks = tracker.update([box])
+    results, distances, learn_candidates = face_auth._recognize_locations(None, [box], tracks, tracker,
+                                                                          face_encodings=[None])
+    assert results == [(student, "Recognized", box)]
+    assert distances == [0.3] and learn_candidates == []
@@ -0,0 +1,213 @@
+"""
+Per-frame pipeline tracing for the hostel management system.
+Each frame carries a sequence id and monotonic stage timings from capture to
+display; traces are written as JSON lines to a rotating file by a background
+thread. Run this module on trace files to print a latency breakdown:
+
+    python tracing.py traces.jsonl [traces.jsonl.1 ...]
+"""
+
+import argparse
+import collections
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+_local = threading.local()
+
+
+class FrameTrace:
+    """Stage timings for one frame (kind "frame") or one recognition job (kind "recognition")"""
+
+    __slots__ = ("kind", "gate", "seq", "start", "stages")
+
+    def __init__(self, kind, gate, seq):
+        self.kind = kind
+        self.gate = gate
+        self.seq = seq
+        self.start = time.monotonic()
+        self.stages = []
+
+    def stage(self, name):
+        """Context manager timing one stage of this trace"""
+        return _Stage(self, name)
+
+    def add(self, name, start, end):
+        """Record a stage from monotonic start and end times"""
+        self.stages.append((name, start, end))
+
+    def to_record(self):
+        """Convert to a JSON-serializable dictionary (times in ms from the trace start)"""
+        end = time.monotonic()
+        return {
+            "kind": self.kind,
+            "gate": self.gate,
+            "seq": self.seq,
+            "start": round(self.start, 6),
+            "total_ms": round((end - self.start) * 1000, 3),
+            "stages": [[name, round((s - self.start) * 1000, 3), round((e - s) * 1000, 3)]
+                       for name, s, e in self.stages],
+        }
+
+
+class _Stage:
+    __slots__ = ("trace", "name", "begin")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.begin = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.stages.append((self.name, self.begin, time.monotonic()))
+        return False
+
+
+class _NullTrace:
+    """Trace that records nothing, used when tracing is off"""
+
+    seq = None
+    start = 0.0
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def add(self, name, start, end):
+        pass
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+NULL_TRACE = _NullTrace()
+
+
+def stage(name):
+    """Time a stage of the trace active on this thread"""
+    trace = getattr(_local, "trace", None)
+    return trace.stage(name) if trace is not None else _NULL_STAGE
+
+
+def activate(trace):
+    """Make a trace (or None) the active one on this thread"""
+    _local.trace = trace if trace is not NULL_TRACE else None
+
+
+class activated:
+    """Context manager making a trace the active one on this thread"""
+
+    def __init__(self, trace):
+        self.trace = trace if trace is not NULL_TRACE else None
+
+    def __enter__(self):
+        self.previous = getattr(_local, "trace", None)
+        _local.trace = self.trace
+        return self.trace
+
+    def __exit__(self, *exc):
+        _local.trace = self.previous
+        return False
+
+
+class TraceRecorder:
+    def __init__(self, path="traces.jsonl", max_bytes=10 * 1024 * 1024, backup_count=5):
+        """Write traces as JSON lines to a rotating file from a background thread"""
+        self.path = path
+        self._queue = queue.SimpleQueue()
+
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._listener.start()
+
+    def new_trace(self, kind, gate, seq):
+        """Start a trace"""
+        return FrameTrace(kind, gate, seq)
+
+    def record(self, trace):
+        """Queue a finished trace; serialization and I/O happen on the writer thread"""
+        if trace is NULL_TRACE:
+            return
+        self._queue.put(_TraceLogRecord(trace.to_record()))
+
+    def close(self):
+        """Flush pending traces and stop the writer thread"""
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+
+class _TraceLogRecord(logging.LogRecord):
+    """Log record that serializes its trace only when written"""
+
+    def __init__(self, record):
+        super().__init__("tracing", logging.INFO, __file__, 0, None, None, None)
+        self.record = record
+
+    def getMessage(self):
+        return json.dumps(self.record, separators=(",", ":"))
+
+
+def summarize_traces(paths):
+    """Aggregate stage durations per (kind, stage) from trace files"""
+    durations = collections.defaultdict(list)
+    totals = collections.defaultdict(list)
+
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                totals[record["kind"]].append(record["total_ms"])
+                for name, _, duration in record["stages"]:
+                    durations[(record["kind"], name)].append(duration)
+
+    return durations, totals
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def print_report(paths, top=3):
+    """Print a latency breakdown per stage and flag the slowest stages"""
+    durations, totals = summarize_traces(paths)
+    if not totals:
+        print("No traces found")
+        return
+
+    for kind in sorted(totals):
+        print(f"\n{kind} traces: {len(totals[kind])}, "
+              f"total p50={_percentile(totals[kind], 50):.2f}ms p95={_percentile(totals[kind], 95):.2f}ms")
+        print(f"  {'stage':<16}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+
+        stages = [(name, values) for (k, name), values in durations.items() if k == kind]
+        stages.sort(key=lambda item: sum(item[1]) / len(item[1]), reverse=True)
+        for rank, (name, values) in enumerate(stages):
+            flag = "  <-- slow" if rank < top else ""
+            print(f"  {name:<16}{len(values):>8}{sum(values) / len(values):>10.2f}"
+                  f"{_percentile(values, 50):>10.2f}{_percentile(values, 95):>10.2f}"
+                  f"{_percentile(values, 99):>10.2f}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print a latency breakdown from pipeline traces")
+    parser.add_argument("paths", nargs="+", help="Trace files (JSON lines)")
+    parser.add_argument("--top", type=int, default=3, help="Number of slowest stages to flag")
+    args = parser.parse_args()
+    print_report(args.paths, args.top)
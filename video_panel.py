@@ -0,0 +1,92 @@
+"""
+Video display for the hostel management system GUI.
+Shows camera frames in a label through one PhotoImage that is updated in
+place, shrinking each frame to the label before converting it, so a frame
+costs one small PIL image instead of a full-size PhotoImage.
+"""
+
+import time
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+from metrics import GUI_IMAGE_ALLOCATIONS, GUI_RENDER_SECONDS
+
+
+class VideoPanel:
+    """Renders frames into a Tk label, reusing its PhotoImage and conversion buffers"""
+
+    def __init__(self, label, name="video"):
+        self.label = label
+        self.name = name  # Metrics label
+        self.photo = None
+        self._scaled = None  # Frame shrunk to the label
+        self._rgb = None  # Scaled frame converted to RGB
+
+        # Statistics
+        self.frames = 0
+        self.photo_allocations = 0
+        self.buffer_allocations = 0
+        self.render_seconds = 0.0
+
+    def _buffer(self, buffer, shape):
+        """Reuse buffer if it has the shape, otherwise allocate a new one"""
+        if buffer is not None and buffer.shape == shape:
+            return buffer
+        self.buffer_allocations += 1
+        GUI_IMAGE_ALLOCATIONS.inc(panel=self.name, kind="buffer")
+        return np.empty(shape, dtype=np.uint8)
+
+    def display_size(self, frame):
+        """(width, height) the frame is shown at: fitted to the label, never enlarged"""
+        height, width = frame.shape[:2]
+        label_width, label_height = self.label.winfo_width(), self.label.winfo_height()
+        if label_width <= 1 or label_height <= 1:
+            return width, height  # Not laid out yet
+        scale = min(label_width / width, label_height / height, 1.0)
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    def show(self, frame, bgr=False):
+        """Display an RGB frame (BGR if bgr is set)"""
+        start = time.perf_counter()
+
+        # Shrink first so the colour conversion and the Tk transfer only see displayed pixels
+        width, height = self.display_size(frame)
+        if (width, height) != (frame.shape[1], frame.shape[0]):
+            self._scaled = self._buffer(self._scaled, (height, width, 3))
+            cv2.resize(frame, (width, height), dst=self._scaled, interpolation=cv2.INTER_AREA)
+            frame = self._scaled
+
+        if bgr:
+            self._rgb = self._buffer(self._rgb, frame.shape)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+            frame = self._rgb
+
+        image = Image.fromarray(frame)
+        if self.photo is None or (self.photo.width(), self.photo.height()) != image.size:
+            self.photo = ImageTk.PhotoImage(image=image)
+            self.label.config(image=self.photo)
+            self.photo_allocations += 1
+            GUI_IMAGE_ALLOCATIONS.inc(panel=self.name, kind="photo")
+        else:
+            self.photo.paste(image)
+
+        elapsed = time.perf_counter() - start
+        self.frames += 1
+        self.render_seconds += elapsed
+        GUI_RENDER_SECONDS.observe(elapsed, panel=self.name)
+
+    def clear(self):
+        """Remove the image from the label"""
+        self.label.config(image="")
+        self.photo = None
+
+    def stats(self):
+        """Frames rendered, allocations and the mean render time"""
+        return {
+            "frames": self.frames,
+            "photo_allocations": self.photo_allocations,
+            "buffer_allocations": self.buffer_allocations,
+            "render_ms": round(self.render_seconds / self.frames * 1000, 2) if self.frames else None,
+        }
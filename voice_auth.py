@@ -3,8 +3,6 @@ Voice authentication module for hostel management system.
 Provides fallback authentication when face recognition fails.
 """
 
-import speech_recognition as sr
-import pyttsx3
 import threading
 import time
 import re
@@ -12,25 +10,22 @@ import tkinter as tk
 
 # Import the voice recognition dialog
 from voice_recognition_dialog import VoiceRecognitionDialog
+from lazy_modules import LazyModule
+from metrics import VOICE_AUTH_ATTEMPTS
+
+# The speech engines are imported when voice authentication is first used
+sr = LazyModule("speech_recognition")
+pyttsx3 = LazyModule("pyttsx3")
 
 class VoiceAuthenticator:
     def __init__(self, database):
         """Initialize the voice authenticator with a database connection"""
         self.database = database
-        self.recognizer = sr.Recognizer()
-        self.engine = pyttsx3.init()
-
-        # Configure voice properties
-        self.engine.setProperty('rate', 150)  # Speed of speech
-        self.engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
 
-        # Get available voices
-        voices = self.engine.getProperty('voices')
-        # Set a female voice if available
-        for voice in voices:
-            if 'female' in voice.name.lower():
-                self.engine.setProperty('voice', voice.id)
-                break
+        # Recognizer and speech engine are built on first use
+        self._recognizer = None
+        self._engine = None
+        self._init_lock = threading.Lock()
 
         # For thread safety
         self.speak_lock = threading.Lock()
@@ -39,6 +34,36 @@ class VoiceAuthenticator:
         # Patterns for recognition
         self.roll_pattern = re.compile(r'\b[a-zA-Z]\d{7}\b')  # e.g., B20CS001
 
+    @property
+    def recognizer(self):
+        """Speech recognizer, created on first use"""
+        with self._init_lock:
+            if self._recognizer is None:
+                self._recognizer = sr.Recognizer()
+            return self._recognizer
+
+    @property
+    def engine(self):
+        """Text-to-speech engine, initialised on first use"""
+        with self._init_lock:
+            if self._engine is None:
+                engine = pyttsx3.init()
+
+                # Configure voice properties
+                engine.setProperty('rate', 150)  # Speed of speech
+                engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
+
+                # Get available voices
+                voices = engine.getProperty('voices')
+                # Set a female voice if available
+                for voice in voices:
+                    if 'female' in voice.name.lower():
+                        engine.setProperty('voice', voice.id)
+                        break
+
+                self._engine = engine
+            return self._engine
+
     def speak(self, text):
         """Speak the given text"""
         with self.speak_lock:
@@ -146,6 +171,7 @@ class VoiceAuthenticator:
                                 timeout=10, root=root)
 
             if not response:
+                VOICE_AUTH_ATTEMPTS.inc(result="no_speech")
                 if attempt < 2:
                     self.speak("I didn't catch that. Please try again.")
                 continue
@@ -156,9 +182,11 @@ class VoiceAuthenticator:
                 roll_number = roll_match.group(0)
                 student = self.database.get_student_by_roll_number(roll_number)
                 if student:
+                    VOICE_AUTH_ATTEMPTS.inc(result="success")
                     self.speak(f"Authentication successful. Welcome, {student[2]}.")
                     return student
                 else:
+                    VOICE_AUTH_ATTEMPTS.inc(result="no_match")
                     if attempt < 2:
                         self.speak(f"No student found with roll number {roll_number}. Please try again.")
             else:
@@ -171,9 +199,11 @@ class VoiceAuthenticator:
                     # student format: (id, roll_number, name, hostel_name, room_number, contact_number)
                     name = student[2].lower()
                     if name in response:
+                        VOICE_AUTH_ATTEMPTS.inc(result="success")
                         self.speak(f"Authentication successful. Welcome, {student[2]}.")
                         return student
 
+                VOICE_AUTH_ATTEMPTS.inc(result="no_match")
                 if attempt < 2:
                     self.speak("I couldn't find your record. Please state your full name or roll number.")
 